@@ -0,0 +1,156 @@
+# bench_collector.py
+# Collector throughput benchmark against the local fake upstream:
+#   python bench_collector.py --duration 20 --workers 32 --latency-ms 50
+# Runs the real collector loop for a fixed time with storage in a temporary
+# directory and git publishing off, then reports VINs/s and p50/p95/p99
+# latency for each stage (fetch, validate, classify, save).
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import tempfile
+import time
+from collections import defaultdict
+from functools import partial, wraps
+
+import aiohttp
+import numpy as np
+
+import vin_collector
+from fake_upstream import UPSTREAM, UpstreamConfig, start_server
+
+STAGES = ("fetch", "validate", "classify", "save", "handle")
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.counts = defaultdict(int)
+
+    def wrap(self, stage, func):
+        @wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.samples[stage].append(time.perf_counter() - start)
+        return timed
+
+    def trace_config(self):
+        # Times each upstream request from send to response headers + body
+        async def on_start(session, context, params):
+            context.start = time.perf_counter()
+
+        async def on_end(session, context, params):
+            self.samples["fetch"].append(time.perf_counter() - context.start)
+
+        config = aiohttp.TraceConfig()
+        config.on_request_start.append(on_start)
+        config.on_request_end.append(on_end)
+        return config
+
+    def report(self, elapsed):
+        stages = {}
+        for stage in STAGES:
+            samples = np.array(self.samples.get(stage, []))
+            if not len(samples):
+                continue
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000
+            stages[stage] = {"count": len(samples), "p50_ms": round(p50, 4),
+                             "p95_ms": round(p95, 4), "p99_ms": round(p99, 4)}
+        return {"elapsed": round(elapsed, 3), "stages": stages,
+                "fetched_per_s": round(self.counts["fetched"] / elapsed, 2),
+                "saved_per_s": round(self.counts["saved"] / elapsed, 2),
+                **{key: self.counts[key] for key in ("fetched", "saved", "rejected")}}
+
+
+@contextlib.contextmanager
+def instrumented_collector(timer, url, data_dir):
+    # Patch the collector's module globals so its own loops run unchanged
+    saved = {name: getattr(vin_collector, name) for name in
+             ("REAL_VIN_API", "DATA_DIR", "PUBLISH_ENABLED", "is_valid_vin", "get_make",
+              "save_vin", "handle_vin", *vin_collector.STORAGE_GLOBALS)}
+    session_class = aiohttp.ClientSession
+
+    def counted_handle(vin):
+        timer.counts["fetched"] += 1
+        make = handle(vin)
+        timer.counts["saved" if make else "rejected"] += 1
+        return make
+
+    vin_collector.REAL_VIN_API = url
+    vin_collector.DATA_DIR = data_dir
+    vin_collector.PUBLISH_ENABLED = False
+    vin_collector.reset_storage()
+    vin_collector.is_valid_vin = timer.wrap("validate", saved["is_valid_vin"])
+    vin_collector.get_make = timer.wrap("classify", saved["get_make"])
+    vin_collector.save_vin = timer.wrap("save", saved["save_vin"])
+    handle = timer.wrap("handle", saved["handle_vin"])
+    vin_collector.handle_vin = counted_handle
+    aiohttp.ClientSession = partial(session_class, trace_configs=[timer.trace_config()])
+    try:
+        yield
+    finally:
+        aiohttp.ClientSession = session_class
+        vin_collector.close_storage()
+        for name, value in saved.items():
+            setattr(vin_collector, name, value)
+
+
+async def run_benchmark(duration, workers, rate, config, mode="concurrent"):
+    runner, url = await start_server(config)
+    timer = StageTimer()
+    try:
+        with tempfile.TemporaryDirectory() as data_dir:
+            with instrumented_collector(timer, url, data_dir):
+                if mode == "forever":
+                    loop = vin_collector.fetch_vins_forever()
+                else:
+                    loop = vin_collector.fetch_vins_concurrently(workers, rate, report_interval=duration + 1)
+                start = time.perf_counter()
+                # The collector prints a line per VIN; keep that out of the timings
+                with contextlib.redirect_stdout(io.StringIO()):
+                    try:
+                        await asyncio.wait_for(loop, duration)
+                    except asyncio.TimeoutError:
+                        pass
+                elapsed = time.perf_counter() - start
+    finally:
+        upstream = runner.app[UPSTREAM]
+        await runner.cleanup()
+    result = timer.report(elapsed)
+    result["upstream"] = {"requests": upstream.requests, "errors": upstream.errors}
+    return result
+
+
+def print_report(result):
+    print(f"⏱️  {result['elapsed']:.1f}s: {result['fetched']} fetched, {result['saved']} saved, "
+          f"{result['rejected']} rejected, {result['upstream']['errors']} upstream errors")
+    print(f"📈 {result['fetched_per_s']:.1f} VINs/s fetched, {result['saved_per_s']:.1f} VINs/s saved")
+    print(f"{'stage':<10}{'count':>10}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}")
+    for stage, row in result["stages"].items():
+        print(f"{stage:<10}{row['count']:>10}{row['p50_ms']:>12.3f}{row['p95_ms']:>12.3f}{row['p99_ms']:>12.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the VIN collector against a fake upstream")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--mode", choices=["concurrent", "forever"], default="concurrent",
+                        help="fetch_vins_concurrently or the serial fetch_vins_forever loop")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=None, help="global request limit in req/s")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="median upstream latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    config = UpstreamConfig(args.latency_ms, args.latency_sigma, args.error_rate, seed=args.seed)
+    result = asyncio.run(run_benchmark(args.duration, args.workers, args.rate, config, args.mode))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
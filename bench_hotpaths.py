@@ -0,0 +1,284 @@
+# bench_hotpaths.py
+# Microbenchmarks for the VIN hot paths on fixed, seeded datasets:
+#   python bench_hotpaths.py --sizes 1k,1M,10M -o results.json
+#   python bench_hotpaths.py --sizes 1M --compare results.json
+# Every dataset size gets the same VINs on every run and branch, so two
+# result files can be compared directly; --compare exits non-zero when any
+# benchmark got slower than --threshold.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import aiohttp
+import numpy as np
+
+import vin_collector
+from fake_upstream import UpstreamConfig, start_server
+from vin_bulk import generate_batch, make_table
+from vin_decoder import decode, decode_many
+from vin_generator import compute_check_digit, model_year
+from vin_sampler import VinSampler
+from vin_validator import is_valid_vin, validate_many
+from wmi_registry import WMI_REGISTRY, classify, classify_many
+
+DATASET_SEED = 3779
+CHUNK_SIZE = 1_000_000
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+BENCHMARKS = {}
+
+
+def benchmark(name, limit=None):
+    # limit caps the items a per-VIN Python loop runs over, so scalar paths
+    # stay usable at 10M; vectorized paths always run on the full dataset
+    def register(func):
+        BENCHMARKS[name] = (func, limit)
+        return func
+    return register
+
+
+def parse_size(value):
+    if value in SIZES:
+        return SIZES[value]
+    return int(float(value))
+
+
+def make_dataset(size, seed=DATASET_SEED):
+    # Registered makes only, so classification and storage see realistic hits
+    table = make_table(tuple(WMI_REGISTRY))
+    rng = np.random.default_rng(seed)
+    out = np.empty(size, dtype="S17")
+    for start in range(0, size, CHUNK_SIZE):
+        matrix, _, _ = generate_batch(table, min(CHUNK_SIZE, size - start), rng,
+                                      last_year=2025)
+        out[start:start + len(matrix)] = matrix.view("S17").ravel()
+    return out
+
+
+@benchmark("classify", limit=1_000_000)
+def bench_classify(vins, ctx):
+    for vin in ctx.strings(vins):
+        classify(vin)
+
+
+@benchmark("classify_many")
+def bench_classify_many(vins, ctx):
+    classify_many(vins)
+
+
+@benchmark("check_digit", limit=1_000_000)
+def bench_check_digit(vins, ctx):
+    for vin in ctx.strings(vins):
+        compute_check_digit(vin)
+
+
+@benchmark("is_valid_vin", limit=1_000_000)
+def bench_is_valid_vin(vins, ctx):
+    for vin in ctx.strings(vins):
+        is_valid_vin(vin)
+
+
+@benchmark("validate_many")
+def bench_validate_many(vins, ctx):
+    validate_many(vins)
+
+
+@benchmark("model_year", limit=1_000_000)
+def bench_model_year(vins, ctx):
+    for vin in ctx.strings(vins):
+        model_year(vin)
+
+
+@benchmark("decode", limit=1_000_000)
+def bench_decode(vins, ctx):
+    for vin in ctx.strings(vins):
+        decode(vin)
+
+
+@benchmark("decode_many")
+def bench_decode_many(vins, ctx):
+    decode_many(vins)
+
+
+@benchmark("save_vin", limit=200_000)
+def bench_save_vin(vins, ctx):
+    # The collector's own save path (dedupe + buffered append) in a temp dir
+    saved = (vin_collector.DATA_DIR, vin_collector.PUBLISH_ENABLED)
+    with tempfile.TemporaryDirectory() as data_dir:
+        vin_collector.DATA_DIR, vin_collector.PUBLISH_ENABLED = data_dir, False
+        vin_collector.reset_storage()
+        try:
+            for vin in ctx.strings(vins):
+                vin_collector.save_vin(vin, classify(vin))
+            vin_collector.close_storage()
+        finally:
+            vin_collector.reset_storage()
+            vin_collector.DATA_DIR, vin_collector.PUBLISH_ENABLED = saved
+
+
+@benchmark("file_load_choice", limit=20)
+def bench_file_load_choice(vins, ctx):
+    # The original main.py path: read the whole make file per click
+    path = ctx.make_file()
+    rng = random.Random(0)
+    for _ in range(len(vins)):
+        with open(path) as f:
+            rng.choice([line.strip() for line in f if line.strip()])
+
+
+@benchmark("sampler_sample", limit=1_000_000)
+def bench_sampler_sample(vins, ctx):
+    sampler = VinSampler(ctx.make_file())
+    rng = random.Random(0)
+    try:
+        for _ in range(len(vins)):
+            sampler.sample(rng)
+    finally:
+        sampler.close()
+
+
+@benchmark("upstream_session", limit=2_000)
+def bench_upstream_session(vins, ctx):
+    # One pooled session, as main.py and the collector use now
+    async def run(url):
+        async with aiohttp.ClientSession() as session:
+            for _ in range(len(vins)):
+                async with session.get(url) as response:
+                    await response.text()
+    ctx.upstream(run)
+
+
+@benchmark("upstream_per_request", limit=500)
+def bench_upstream_per_request(vins, ctx):
+    # A fresh session (and connection) per request, as the original main.py did
+    async def run(url):
+        for _ in range(len(vins)):
+            async with aiohttp.ClientSession() as session:
+                async with session.get(url) as response:
+                    await response.text()
+    ctx.upstream(run)
+
+
+class Context:
+    # Lazily built, per-dataset fixtures shared by the benchmarks
+    def __init__(self, vins, workdir):
+        self.vins = vins
+        self.workdir = workdir
+        self._strings = None
+        self._make_file = None
+
+    def strings(self, vins):
+        if self._strings is None or len(self._strings) < len(vins):
+            self._strings = vins.astype(str).tolist()
+        return self._strings[:len(vins)]
+
+    def make_file(self):
+        # The whole dataset as one make file, 18-byte records
+        if self._make_file is None:
+            self._make_file = os.path.join(self.workdir, f"make_bench_{len(self.vins)}.txt")
+            with open(self._make_file, "wb") as f:
+                for start in range(0, len(self.vins), CHUNK_SIZE):
+                    chunk = self.vins[start:start + CHUNK_SIZE]
+                    f.write(b"\n".join(chunk.tolist()) + b"\n")
+        return self._make_file
+
+    def upstream(self, run):
+        async def main():
+            runner, url = await start_server(UpstreamConfig(latency_ms=0, latency_sigma=0, seed=0))
+            try:
+                await run(url + "?type=real")
+            finally:
+                await runner.cleanup()
+        asyncio.run(main())
+
+
+def run_one(name, vins, ctx, repeat):
+    func, limit = BENCHMARKS[name]
+    items = vins[:limit] if limit else vins
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(items, ctx)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {"benchmark": name, "dataset": len(vins), "items": len(items), "repeat": repeat,
+            "best_s": round(best, 6), "mean_s": round(sum(timings) / len(timings), 6),
+            "ops_per_s": round(len(items) / best, 1) if best else None}
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "numpy": np.__version__,
+            "platform": platform.platform(), "timestamp": datetime.now().isoformat(timespec="seconds")}
+
+
+def compare(results, baseline, threshold):
+    # Match on (benchmark, dataset, items) and flag throughput drops
+    previous = {(r["benchmark"], r["dataset"], r["items"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get((result["benchmark"], result["dataset"], result["items"]))
+        if not old or not old["ops_per_s"] or not result["ops_per_s"]:
+            continue
+        change = result["ops_per_s"] / old["ops_per_s"] - 1
+        marker = "⚠️" if change < -threshold else "  "
+        print(f"{marker} {result['benchmark']:<22}{result['dataset']:>10}  {change:+7.1%}", file=sys.stderr)
+        if change < -threshold:
+            regressions.append(result["benchmark"])
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the VIN hot paths")
+    parser.add_argument("--sizes", default="1k,1M", help="dataset sizes, e.g. 1k,1M,10M")
+    parser.add_argument("--only", default=None, help="comma-separated benchmark names")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the best is reported")
+    parser.add_argument("-o", "--output", default="-", help="JSON results path, '-' for stdout")
+    parser.add_argument("--compare", default=None, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed throughput drop")
+    parser.add_argument("--list", action="store_true", help="list benchmarks and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, (_, limit) in BENCHMARKS.items():
+            print(f"{name:<22}{'all' if limit is None else f'≤{limit:,}'} items")
+        sys.exit(0)
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in map(parse_size, args.sizes.split(",")):
+            vins = make_dataset(size)
+            ctx = Context(vins, workdir)
+            for name in names:
+                result = run_one(name, vins, ctx, args.repeat)
+                results.append(result)
+                print(f"⏱️  {name:<22}{size:>10} {result['items']:>10} items "
+                      f"{result['best_s']:>10.4f}s {result['ops_per_s']:>14,.0f}/s", file=sys.stderr)
+
+    report = {"environment": environment(), "dataset_seed": DATASET_SEED, "results": results}
+    if args.output == "-":
+        print(json.dumps(report, indent=2))
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"❌ Slower than baseline: {', '.join(sorted(set(regressions)))}", file=sys.stderr)
+            sys.exit(1)
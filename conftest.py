@@ -0,0 +1,32 @@
+# conftest.py
+# Shared fixtures: vin_collector pointed at a scratch data directory, with
+# git publishing off and its storage globals reset before and after.
+import random
+
+import pytest
+
+import vin_collector
+from vin_generator import generate_vin
+from wmi_registry import WMI_CODES
+
+
+@pytest.fixture
+def collector(tmp_path, monkeypatch):
+    monkeypatch.setattr(vin_collector, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(vin_collector, "STORAGE_BACKEND", "files")
+    monkeypatch.setattr(vin_collector, "PUBLISH_ENABLED", False)
+    vin_collector.reset_storage()
+    yield vin_collector
+    vin_collector.close_storage()
+    vin_collector.reset_storage()
+
+
+def make_vins(make, count, seed=0):
+    # Distinct valid VINs for one make
+    rng = random.Random(seed)
+    vins = []
+    while len(vins) < count:
+        vin = generate_vin(WMI_CODES[make], rng=rng)
+        if vin not in vins:
+            vins.append(vin)
+    return vins
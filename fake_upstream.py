@@ -0,0 +1,129 @@
+# fake_upstream.py
+# Local stand-in for randomvin.com/getvin.php with configurable latency,
+# error rate and WMI mix, for offline runs and throughput benchmarks:
+#   python fake_upstream.py --port 8765 --latency-ms 80 --error-rate 0.02
+#   VIN_UPSTREAM_URL=http://127.0.0.1:8765/getvin.php python vin_collector.py
+import argparse
+import asyncio
+import random
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+from vin_generator import VIN_ALPHABET, generate_vin
+from wmi_registry import WMI_REGISTRY
+
+# Rough share of the upstream's "real" VINs per make; everything not listed
+# (the exotic makes) shares the remaining weight equally
+DEFAULT_WMI_MIX = {
+    "Ford": 14, "Chevrolet": 13, "Toyota": 11, "Honda": 9, "Nissan": 8, "Hyundai": 5,
+    "Jeep": 4, "Dodge": 4, "Kia": 4, "Subaru": 4, "Volkswagen": 3, "BMW": 3, "Mercedes": 3,
+    "Mazda": 2, "Lexus": 2, "Tesla": 1, "Audi": 1, "Acura": 1, "Infiniti": 1, "Volvo": 1,
+    "Mitsubishi": 1,
+}
+UNKNOWN_WMI_SHARE = 0.05
+
+
+@dataclass
+class UpstreamConfig:
+    latency_ms: float = 50.0
+    latency_sigma: float = 0.5  # lognormal shape; 0 for a fixed latency
+    error_rate: float = 0.0
+    unknown_rate: float = UNKNOWN_WMI_SHARE
+    wmi_mix: dict = field(default_factory=lambda: dict(DEFAULT_WMI_MIX))
+    seed: int = None
+
+
+class FakeUpstream:
+    def __init__(self, config=None):
+        self.config = config or UpstreamConfig()
+        self.rng = random.Random(self.config.seed)
+        mix = dict(self.config.wmi_mix)
+        rare = [make for make in WMI_REGISTRY if make not in mix]
+        for make in rare:
+            mix[make] = 0.5
+        self.makes = list(mix)
+        self.weights = [mix[make] for make in self.makes]
+        self.requests = 0
+        self.errors = 0
+
+    def latency(self):
+        median = self.config.latency_ms / 1000
+        if self.config.latency_sigma <= 0:
+            return median
+        return self.rng.lognormvariate(0, self.config.latency_sigma) * median
+
+    def real_vin(self):
+        if self.rng.random() < self.config.unknown_rate:
+            wmi = "".join(self.rng.choice(VIN_ALPHABET) for _ in range(3))
+            return generate_vin(wmi, rng=self.rng)
+        make = self.rng.choices(self.makes, self.weights)[0]
+        return generate_vin(self.rng.choice(WMI_REGISTRY[make]), rng=self.rng)
+
+    def fake_vin(self):
+        vin = generate_vin("".join(self.rng.choice(VIN_ALPHABET) for _ in range(3)), rng=self.rng)
+        # Fake VINs deliberately carry a wrong check digit half of the time
+        if self.rng.random() < 0.5:
+            vin = vin[:8] + ("X" if vin[8] != "X" else "0") + vin[9:]
+        return vin
+
+    async def getvin(self, request):
+        self.requests += 1
+        await asyncio.sleep(self.latency())
+        if self.rng.random() < self.config.error_rate:
+            self.errors += 1
+            if self.rng.random() < 0.5:
+                raise web.HTTPServiceUnavailable(text="upstream overloaded")
+            return web.Response(text="<html><body>Database error</body></html>", content_type="text/html")
+        kind = request.query.get("type", "real")
+        vin = self.fake_vin() if kind == "fake" else self.real_vin()
+        return web.Response(text=vin + "\n")
+
+
+UPSTREAM = web.AppKey("upstream", FakeUpstream)
+
+
+def create_app(config=None):
+    upstream = FakeUpstream(config)
+    app = web.Application()
+    app[UPSTREAM] = upstream
+    app.router.add_get("/getvin.php", upstream.getvin)
+    return app
+
+
+async def start_server(config=None, host="127.0.0.1", port=0):
+    # Returns (runner, url) for in-process use; call runner.cleanup() to stop
+    runner = web.AppRunner(create_app(config))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}/getvin.php"
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(","):
+        make, _, weight = item.partition("=")
+        if make.strip() not in WMI_REGISTRY:
+            raise argparse.ArgumentTypeError(f"unknown make: {make}")
+        mix[make.strip()] = float(weight or 1)
+    return mix
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve fake randomvin.com responses")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="median response latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="lognormal sigma, 0 = fixed")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--unknown-rate", type=float, default=UNKNOWN_WMI_SHARE,
+                        help="share of real VINs with an unregistered WMI")
+    parser.add_argument("--wmi-mix", type=parse_mix, default=None, help="e.g. Ford=10,Bugatti=0.1")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = UpstreamConfig(args.latency_ms, args.latency_sigma, args.error_rate, args.unknown_rate,
+                            args.wmi_mix or dict(DEFAULT_WMI_MIX), args.seed)
+    web.run_app(create_app(config), host=args.host, port=args.port)
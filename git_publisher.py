@@ -0,0 +1,139 @@
+# git_publisher.py
+# Background git publisher: coalesces saved VINs into one commit every
+# `interval` seconds or `max_pending` VINs, so collection never waits on git.
+import subprocess
+import threading
+import time
+from datetime import datetime
+
+from vin_metrics import counter, histogram
+
+GIT_COMMIT_SECONDS = histogram("vin_git_commit_seconds", "Duration of auto_git_commit (add, commit, push)")
+GIT_COMMITS = counter("vin_git_commits_total", "auto_git_commit runs by result", ["result"])
+
+
+# Auto commit changes to GitHub
+def auto_git_commit(push=True):
+    with GIT_COMMIT_SECONDS.time():
+        ok = _git_commit(push)
+    GIT_COMMITS.inc(result="ok" if ok else "failed")
+    return ok
+
+
+def _unpushed_commits():
+    # Commits on HEAD that its upstream lacks; None without an upstream
+    result = subprocess.run(["git", "rev-list", "--count", "@{u}..HEAD"], capture_output=True, text=True)
+    return int(result.stdout) if result.returncode == 0 else None
+
+
+def _git_commit(push):
+    try:
+        subprocess.run(["git", "add", "--", "vin_data/*.txt"], check=True)
+        staged = subprocess.run(["git", "diff", "--cached", "--quiet"])
+        committed = staged.returncode != 0
+        if committed:
+            subprocess.run(["git", "commit", "-q", "-m", "Auto: update VIN files"], check=True)
+            print(f"[{datetime.now()}] ✨ Auto-committed VIN files")
+        # Also retries commits whose earlier push failed
+        unpushed = _unpushed_commits()
+        if push and (unpushed or (unpushed is None and committed)):
+            subprocess.run(["git", "push", "-q"], check=True)
+            print(f"[{datetime.now()}] ✨ Pushed VIN files to GitHub")
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"[{datetime.now()}] ⚠️ Git commit failed: {e}")
+        return False
+
+
+class GitPublisher:
+    def __init__(self, interval=60, max_pending=10_000, push=True, before_publish=None):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.push = push
+        self.before_publish = before_publish
+        self.pending = 0
+        self.oldest_pending = None
+        self.publishes = 0
+        self.failures = 0
+        self.last_latency = None
+        self.last_published_at = None
+        self._stopping = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="git-publisher", daemon=True)
+        self._thread.start()
+
+    def notify(self, count=1):
+        with self._cond:
+            if self.oldest_pending is None:
+                self.oldest_pending = time.monotonic()
+            self.pending += count
+            if self.pending >= self.max_pending:
+                self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            age = time.monotonic() - self.oldest_pending if self.oldest_pending else 0.0
+            return {
+                "backlog": self.pending,
+                "backlog_age": age,
+                "publishes": self.publishes,
+                "failures": self.failures,
+                "last_latency": self.last_latency,
+                "last_published_at": self.last_published_at,
+            }
+
+    def stop(self, flush=True):
+        with self._cond:
+            self._stopping = True
+            if not flush:
+                self.pending = 0
+            self._cond.notify()
+        self._thread.join()
+
+    def _due(self):
+        if not self.pending:
+            return False
+        if self._stopping or self.pending >= self.max_pending:
+            return True
+        return time.monotonic() - self.oldest_pending >= self.interval
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._due():
+                    if self._stopping:
+                        return
+                    self._cond.wait(timeout=1.0)
+                batch = self.pending
+                self.pending = 0
+                self.oldest_pending = None
+                stopping = self._stopping
+            self._publish(batch)
+            if stopping:
+                return
+
+    def _publish(self, batch):
+        start = time.monotonic()
+        try:
+            if self.before_publish:
+                self.before_publish()
+            ok = auto_git_commit(self.push)
+        except Exception as e:
+            # A failed flush (disk error, index full) must not kill the thread
+            print(f"[{datetime.now()}] ⚠️ Publish failed: {e!r}")
+            GIT_COMMITS.inc(result="failed")
+            ok = False
+        latency = time.monotonic() - start
+        with self._cond:
+            self.last_latency = latency
+            if ok:
+                self.publishes += 1
+                self.last_published_at = datetime.now()
+            else:
+                self.failures += 1
+                # Retry the batch on the next interval
+                self.pending += batch
+                if self.oldest_pending is None:
+                    self.oldest_pending = time.monotonic()
+        if ok:
+            print(f"[{datetime.now()}] 📦 Published {batch} VINs in {latency:.2f}s")
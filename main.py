@@ -1,9 +1,20 @@
 # app.py
 import streamlit as st
-import random
 import asyncio
-import aiohttp
 import os
+import threading
+from datetime import datetime
+from contextlib import closing
+from upstream import FAKE_VIN_API, REAL_VIN_API, UPSTREAM_ERRORS, UpstreamClient
+from vin_db import BACKEND, DB_PATH, VinDatabase
+from vin_decoder import decode
+from vin_fanout import HitRateTracker, fetch_matching_vin
+from vin_generator import MODEL_YEAR_BASE, generate_vin
+from vin_index import INDEX_NAME, VinIndex
+from vin_reservoir import VinReservoir
+from vin_sampler import VinSampler
+from vin_stats import STATS_NAME, VinStats, format_time
+from wmi_registry import WMI_CODES, WMI_REGISTRY
 
 st.set_page_config(
     page_title="VIN Generator",
@@ -11,29 +22,126 @@ st.set_page_config(
     page_icon="https://cdn-icons-png.flaticon.com/512/846/846338.png"
 )
 
-WMI_CODES = {
-    "Toyota": "JTD", "Ford": "1FT", "Honda": "1HG", "BMW": "WBA", "Mercedes": "WDB",
-    "Chevrolet": "1GC", "Tesla": "5YJ", "Audi": "WAU", "Nissan": "1N4", "Hyundai": "KMH",
-    "Kia": "KNA", "Jeep": "1J4", "Dodge": "1B3", "Volkswagen": "3VW", "Subaru": "JF1",
-    "Mazda": "JM1", "Lexus": "JTH", "Volvo": "YV1", "Porsche": "WP0", "Jaguar": "SAJ",
-    "Land Rover": "SAL", "Mitsubishi": "JA3", "Infiniti": "JNK", "Acura": "19U", "Ferrari": "ZFF",
-    "Lamborghini": "ZHW", "Bugatti": "VF9", "Rolls-Royce": "SCA", "Bentley": "SCB"
-}
-
-REAL_VIN_API = "https://randomvin.com/getvin.php?type=real"
-FAKE_VIN_API = "https://randomvin.com/getvin.php?type=fake"
-
-async def fetch_vin(api_url):
-    async with aiohttp.ClientSession() as session:
-        async with session.get(api_url) as response:
-            return await response.text()
-
-async def fetch_valid_vin(manufacturer_wmi):
-    async with aiohttp.ClientSession() as session:
-        while True:
-            response = await fetch_vin(REAL_VIN_API)
-            if response.startswith(manufacturer_wmi):
-                return response.strip()
+UPSTREAM_REFILL_TIMEOUT = 30
+
+# One event loop and one upstream client (pooled session, timeouts, retries,
+# circuit breaker) per server process, shared by every rerun and session
+@st.cache_resource
+def get_event_loop():
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="vin-event-loop", daemon=True).start()
+    return loop
+
+def run_async(coro):
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+@st.cache_resource
+def get_upstream_client():
+    return UpstreamClient(REAL_VIN_API, limit=20)
+
+async def fetch_vin(api_url, client):
+    return await client.fetch(api_url)
+
+@st.cache_resource
+def get_hit_rate_tracker():
+    return HitRateTracker()
+
+# Adaptive fan-out sized from observed WMI hit rates; None once the
+# attempt or time budget is spent instead of looping forever
+# The fan-out already races requests, so they are not hedged again
+async def fetch_valid_vin(manufacturer_wmi, client, tracker):
+    return await fetch_matching_vin(lambda: client.fetch(REAL_VIN_API, hedge=False), manufacturer_wmi,
+                                    tracker, timeout=UPSTREAM_REFILL_TIMEOUT)
+
+@st.cache_resource
+def get_vin_db():
+    return VinDatabase(DB_PATH)
+
+# Cached until make_name.txt changes on disk
+@st.cache_data
+def load_available_makes(path, mtime):
+    with open(path) as f:
+        return sorted(set(line.strip() for line in f if line.strip()))
+
+# SELECT DISTINCT make walks the whole make index, so it runs once per
+# database change (writes land in the -wal file first) and at most once a
+# minute, not on every rerun
+@st.cache_data(ttl=60)
+def load_db_makes(path, mtime):
+    return get_vin_db().makes()
+
+def db_mtime(path):
+    return max((os.path.getmtime(p) for p in (path, path + "-wal") if os.path.exists(p)), default=0.0)
+
+# Corpus totals from the sidecar the collector keeps current; cached until
+# it is next saved
+@st.cache_data
+def load_corpus_stats(data_dir, mtime):
+    return VinStats(data_dir).to_dict()
+
+# One sampler per path for the life of the process: it remaps on appends
+# and swaps to the new file when the old one is replaced
+@st.cache_resource
+def get_sampler(path):
+    return VinSampler(path)
+
+def sample_stored_vins(make, count, vin_db=None, sampler=None):
+    if vin_db is not None:
+        # Uniform draws, mostly one primary-key lookup each
+        vins = vin_db.random_vins(make, count)
+        if vins:
+            return vins
+    path = f"vin_data/make_{make}.txt"
+    if sampler is None:
+        if not os.path.exists(path):
+            return []
+        with closing(VinSampler(path)) as own_sampler:
+            return sample_stored_vins(make, count, sampler=own_sampler)
+    vins = (sampler.sample() for _ in range(count))
+    return [vin for vin in vins if vin]
+
+# Secondary index over the make files for filtered draws; refresh() only
+# indexes VINs appended since the last call. Building one from scratch
+# takes minutes on a large corpus, so that is left to the CLI
+INDEX_PATH = os.path.join("vin_data", INDEX_NAME)
+
+@st.cache_resource
+def get_vin_index():
+    return VinIndex.open("vin_data"), threading.Lock()
+
+def sample_filtered(make, years, plant):
+    index, lock = get_vin_index()
+    with lock:
+        index.refresh()
+        return index.sample(make=make, years=years, plant=plant or None)
+
+# Per-make pools refilled in the background from stored VINs and, for
+# sessions with live fetching enabled, from randomvin.com; the button
+# handler only pops. The flag is part of the key, so each session's
+# checkbox picks its own reservoir and at most two are ever running
+@st.cache_resource
+def get_reservoir(backend, live_fetch):
+    vin_db = get_vin_db() if backend == "sqlite" else None
+    stored = [lambda make, count: sample_stored_vins(make, count, vin_db)]
+    if not live_fetch:
+        return VinReservoir(WMI_CODES, stored)
+    loop, client, tracker = get_event_loop(), get_upstream_client(), get_hit_rate_tracker()
+    def fetch_upstream(make, count):
+        if make not in WMI_REGISTRY:
+            return []
+        coro = fetch_valid_vin(tuple(WMI_REGISTRY[make]), client, tracker)
+        vin = asyncio.run_coroutine_threadsafe(coro, loop).result()
+        return [vin] if vin else []
+    return VinReservoir(WMI_CODES, stored, fallback_sources=[fetch_upstream])
+
+# The VIN itself plus a one-line decode underneath
+def show_vin(vin):
+    st.markdown(f'<div class="big-vin">{vin}</div>', unsafe_allow_html=True)
+    info = decode(vin)
+    plant = info.plant or (f"plant {info.plant_code}" if info.plant_code else None)
+    details = [info.make, info.model_year and str(info.model_year), plant, info.region,
+               "check digit ✓" if info.valid else "check digit ✗"]
+    st.caption(" · ".join(detail for detail in details if detail))
 
 st.markdown("""
     <style>
@@ -69,39 +177,80 @@ st.markdown("""
 
 st.title("🚗 Random VIN Generator")
 
+vin_db = get_vin_db() if BACKEND == "sqlite" else None
+
 make_file = "vin_data/make_name.txt"
-if os.path.exists(make_file):
-    with open(make_file) as f:
-        available_makes = sorted(set(line.strip() for line in f))
+db_makes = load_db_makes(DB_PATH, db_mtime(DB_PATH)) if vin_db is not None else []
+if db_makes:
+    available_makes = db_makes
+elif os.path.exists(make_file):
+    available_makes = load_available_makes(make_file, os.path.getmtime(make_file))
 else:
     available_makes = sorted(WMI_CODES.keys())
 
 selected_manufacturer = st.selectbox("Select Manufacturer", available_makes)
+stats_file = os.path.join("vin_data", STATS_NAME)
+if os.path.exists(stats_file):
+    corpus = load_corpus_stats("vin_data", os.path.getmtime(stats_file))
+    entry = corpus["makes"].get(selected_manufacturer) or {"count": 0}
+    stored = f"{entry['count']:,} stored {selected_manufacturer} VINs"
+    if entry["count"]:
+        stored += f", last collected {format_time(entry['last_seen'])}"
+    st.caption(f"{stored} · {corpus['total']:,} VINs in total")
+
+use_live_fetch = st.checkbox("Fetch live from randomvin.com when no VINs are stored")
+
+years = plant = None
+if vin_db is None:
+    with st.expander("Filter stored VINs by model year and plant"):
+        this_year = datetime.now().year
+        if st.checkbox("Model years"):
+            years = st.slider("Model years", MODEL_YEAR_BASE, this_year, (2015, min(2018, this_year)))
+        plant = st.text_input("Plant code (position 11)", max_chars=1).strip().upper() or None
 
 if st.button("Generate VIN by Manufacturer"):
-    file_path = f"vin_data/make_{selected_manufacturer}.txt"
-    if os.path.exists(file_path):
-        with open(file_path, "r") as f:
-            vins = [line.strip() for line in f if line.strip()]
-        if vins:
-            st.markdown(f'<div class="big-vin">{random.choice(vins)}</div>', unsafe_allow_html=True)
-        else:
-            st.warning("No VINs available yet for this make.")
+    # Pool first; on a cold pool fall back to an O(1) stored sample, then to
+    # local generation, so the request never waits on the upstream.
+    # Filtered draws come from stored VINs only
+    filtered = years is not None or plant is not None
+    index_missing = filtered and not os.path.exists(INDEX_PATH)
+    if index_missing:
+        valid_vin = None
+    elif filtered:
+        valid_vin = sample_filtered(selected_manufacturer, years, plant)
     else:
+        valid_vin = get_reservoir(BACKEND, use_live_fetch).pop(selected_manufacturer)
+    if not valid_vin and not filtered:
+        file_path = f"vin_data/make_{selected_manufacturer}.txt"
+        sampler = get_sampler(file_path) if os.path.exists(file_path) else None
+        stored = sample_stored_vins(selected_manufacturer, 1, vin_db, sampler) if vin_db or sampler else []
+        valid_vin = stored[0] if stored else None
+    if not valid_vin and not filtered:
         manufacturer_wmi = WMI_CODES.get(selected_manufacturer)
-        if manufacturer_wmi:
-            valid_vin = asyncio.run(fetch_valid_vin(manufacturer_wmi))
-            st.markdown(f'<div class="big-vin">{valid_vin}</div>', unsafe_allow_html=True)
-        else:
-            st.error("Invalid WMI code. Cannot fetch VIN.")
+        valid_vin = generate_vin(manufacturer_wmi) if manufacturer_wmi else None
+    if valid_vin:
+        show_vin(valid_vin)
+    elif index_missing:
+        st.error("Filtering needs the VIN index. Build it once with `python vin_index.py build`; "
+                 "the collector keeps it up to date from then on.")
+    elif filtered:
+        st.warning("No stored VIN matches those filters.")
+    else:
+        st.error("Invalid WMI code. Cannot fetch VIN.")
 
 if st.button("Real VIN Generator (Random)"):
-    real_vin = asyncio.run(fetch_vin(REAL_VIN_API))
-    st.markdown(f'<div class="big-vin">{real_vin.strip()}</div>', unsafe_allow_html=True)
+    try:
+        real_vin = run_async(fetch_vin(REAL_VIN_API, get_upstream_client()))
+        show_vin(real_vin)
+    except UPSTREAM_ERRORS as e:
+        st.error(f"randomvin.com is not responding ({e!r}). Try again shortly.")
 
 if st.button("Dummy VIN Generator (Random)"):
-    dummy_vin = asyncio.run(fetch_vin(FAKE_VIN_API))
-    st.markdown(f'<div class="big-vin">{dummy_vin.strip()}</div>', unsafe_allow_html=True)
+    try:
+        dummy_vin = run_async(fetch_vin(FAKE_VIN_API, get_upstream_client()))
+        show_vin(dummy_vin)
+    except UPSTREAM_ERRORS as e:
+        st.error(f"randomvin.com is not responding ({e!r}). Try again shortly.")
 
 st.markdown('<div class="footer">Made By Piyush Ghante</div>', unsafe_allow_html=True)
 
@@ -0,0 +1,92 @@
+# pages/analytics.py
+# Corpus analytics from the pre-aggregated summary that vin_export.py
+# writes, never from the VINs themselves, so the page loads in the same
+# time at ten thousand VINs or ten million. Run vin_export.py (e.g. from
+# cron) to bring it up to date.
+import os
+from datetime import datetime
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from vin_export import EXPORT_DIR, SUMMARY_NAME, load_summary, summary_totals
+from vin_stats import STATS_NAME, VinStats
+
+st.set_page_config(page_title="VIN Analytics", layout="wide",
+                   page_icon="https://cdn-icons-png.flaticon.com/512/846/846338.png")
+
+SUMMARY_PATH = os.path.join(EXPORT_DIR, SUMMARY_NAME)
+
+# Cached until vin_export.py replaces the summary
+@st.cache_data
+def load_frames(mtime):
+    summary = load_summary(EXPORT_DIR)
+    makes = pd.DataFrame([{"make": make, "vins": stats["count"], "invalid": stats["invalid"]}
+                          for make, stats in summary["makes"].items()],
+                         columns=["make", "vins", "invalid"]).sort_values("vins", ascending=False)
+    years = pd.DataFrame([{"make": make, "model_year": int(year), "vins": count}
+                          for make, stats in summary["makes"].items()
+                          for year, count in stats["model_years"].items()],
+                         columns=["make", "model_year", "vins"])
+    wmis = pd.DataFrame([{"wmi": wmi, "make": make, "vins": count}
+                         for make, stats in summary["makes"].items()
+                         for wmi, count in stats["wmis"].items()],
+                        columns=["wmi", "make", "vins"]).sort_values("vins", ascending=False)
+    history = pd.DataFrame(summary["history"], columns=["time", "vins"])
+    history["time"] = pd.to_datetime(history["time"], unit="s")
+    # VINs per hour between consecutive exports
+    hours = history["time"].diff().dt.total_seconds() / 3600
+    history["vins_per_hour"] = history["vins"].diff().clip(lower=0) / hours
+    return summary["updated_at"], summary_totals(summary), makes, years, wmis, history
+
+st.title("📊 VIN Corpus Analytics")
+
+if not os.path.exists(SUMMARY_PATH):
+    st.info("No export yet. Run `python vin_export.py` to build the Parquet export and its summary.")
+    st.stop()
+
+updated_at, totals, makes, years, wmis, history = load_frames(os.path.getmtime(SUMMARY_PATH))
+
+columns = st.columns(4)
+columns[0].metric("VINs", f"{totals['count']:,}")
+columns[1].metric("Makes", len(makes))
+columns[2].metric("Bad check digit", f"{totals['invalid'] / max(totals['count'], 1):.2%}")
+columns[3].metric("Exported", datetime.fromtimestamp(updated_at).strftime("%Y-%m-%d %H:%M"))
+
+# Upstream traffic the corpus itself cannot tell us about, from the
+# collector's live sidecar
+stats_file = os.path.join("vin_data", STATS_NAME)
+if os.path.exists(stats_file):
+    collector = VinStats("vin_data").to_dict()
+    columns = st.columns(4)
+    columns[0].metric("Stored now", f"{collector['total']:,}")
+    columns[1].metric("Duplicates", f"{collector['duplicates']:,}")
+    columns[2].metric("Unknown WMI", f"{collector['unknown_wmi']:,}")
+
+st.subheader("VINs per make")
+st.plotly_chart(px.bar(makes, x="make", y="vins"), width="stretch")
+
+st.subheader("Model years")
+selected = st.multiselect("Makes", makes["make"].tolist(), placeholder="All makes")
+shown = years[years["make"].isin(selected)] if selected else years
+st.plotly_chart(px.bar(shown, x="model_year", y="vins", color="make" if selected else None),
+                width="stretch")
+
+st.subheader("Collection rate")
+if len(history) < 2:
+    st.caption("Needs at least two exports.")
+else:
+    left, right = st.columns(2)
+    left.plotly_chart(px.line(history, x="time", y="vins", title="Corpus size"), width="stretch")
+    right.plotly_chart(px.bar(history.dropna(), x="time", y="vins_per_hour", title="VINs per hour"),
+                       width="stretch")
+
+left, right = st.columns(2)
+with left:
+    st.subheader("Regions")
+    regions = pd.DataFrame(totals["regions"].items(), columns=["region", "vins"])
+    st.plotly_chart(px.pie(regions, names="region", values="vins"), width="stretch")
+with right:
+    st.subheader("Top WMIs")
+    st.dataframe(wmis.head(25), hide_index=True, width="stretch")
@@ -0,0 +1,49 @@
+# test_app.py
+# The Streamlit page run headless with AppTest against a scratch vin_data/:
+# cached resources survive reruns, and the button serves stored VINs.
+import os
+import threading
+
+import pytest
+
+streamlit = pytest.importorskip("streamlit")
+from streamlit.testing.v1 import AppTest
+
+from conftest import make_vins
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    data_dir = tmp_path / "vin_data"
+    data_dir.mkdir()
+    (data_dir / "make_name.txt").write_text("Tesla\nAudi\n")
+    (data_dir / "make_Tesla.txt").write_text("".join(vin + "\n" for vin in make_vins("Tesla", 20)))
+    monkeypatch.chdir(tmp_path)
+    streamlit.cache_data.clear()
+    streamlit.cache_resource.clear()
+    yield AppTest.from_file(APP, default_timeout=30).run()
+    streamlit.cache_resource.clear()
+
+
+def reservoir_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("vin-reservoir")]
+
+
+def test_makes_come_from_make_name_txt(app):
+    assert not app.exception
+    assert app.selectbox[0].options == ["Audi", "Tesla"]
+
+
+def test_button_serves_stored_vins_and_reuses_cached_resources(app, tmp_path):
+    stored = (tmp_path / "vin_data" / "make_Tesla.txt").read_text().split()
+    app.selectbox[0].select("Tesla").run()
+    before = len(reservoir_threads())
+    for _ in range(3):
+        app.button[0].click().run()
+        assert not app.exception
+        shown = [block.value for block in app.markdown if 'class="big-vin"' in block.value]
+        assert shown and shown[-1].split(">")[1].split("<")[0] in stored
+    # The first click starts the reservoir; later reruns reuse it
+    assert len(reservoir_threads()) - before == 1
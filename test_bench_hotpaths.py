@@ -0,0 +1,30 @@
+# test_bench_hotpaths.py
+# The microbenchmark suite: datasets are identical on every run, every
+# registered benchmark runs on a small dataset, and --compare flags only
+# throughput drops beyond the threshold.
+from bench_hotpaths import BENCHMARKS, Context, compare, make_dataset, run_one
+from vin_validator import is_valid_vin
+
+
+def test_datasets_are_fixed_and_valid():
+    vins = make_dataset(500)
+    assert (vins == make_dataset(500)).all()
+    assert all(is_valid_vin(vin.decode()) for vin in vins)
+
+
+def test_every_benchmark_runs(tmp_path):
+    vins = make_dataset(200)
+    ctx = Context(vins, str(tmp_path))
+    for name in BENCHMARKS:
+        result = run_one(name, vins, ctx, repeat=1)
+        assert result["benchmark"] == name and result["items"] <= 200
+        assert result["best_s"] >= 0
+
+
+def test_compare_flags_only_drops_beyond_the_threshold():
+    def result(name, ops):
+        return {"benchmark": name, "dataset": 1000, "items": 1000, "ops_per_s": ops}
+
+    baseline = {"results": [result("decode", 100.0), result("classify", 100.0), result("gone", 100.0)]}
+    current = [result("decode", 85.0), result("classify", 95.0), result("new", 1.0)]
+    assert compare(current, baseline, threshold=0.10) == ["decode"]
@@ -0,0 +1,69 @@
+# test_bulk.py
+# Bulk generation: every row is a valid VIN of the requested makes and
+# model years, in each output format, and a seed reproduces the output.
+import csv
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from vin_bulk import generate_batch, generate_to, make_table, open_sink
+from vin_decoder import decode
+from vin_validator import is_valid_vin
+from wmi_registry import classify
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def generate(path, fmt, count=2500, **options):
+    sink = open_sink(str(path), fmt)
+    try:
+        generate_to(sink, ["Ford", "Tesla"], count, fmt, seed=42, chunk_size=1000, **options)
+    finally:
+        sink.close()
+    return path
+
+
+def test_batches_are_valid_vins_within_the_year_range():
+    matrix, makes, years = generate_batch(make_table(("Ford", "Tesla")), 5000, np.random.default_rng(1),
+                                          first_year=2000, last_year=2012)
+    vins = matrix.view("S17").ravel().astype(str)
+    assert all(is_valid_vin(vin) for vin in vins)
+    assert [classify(vin) for vin in vins] == makes.tolist()
+    assert years.min() >= 2000 and years.max() <= 2012
+    assert [decode(vin).model_year for vin in vins[:500]] == years[:500].tolist()
+
+
+@pytest.mark.parametrize("fmt", ["txt", "csv", "ndjson"])
+def test_text_formats_hold_the_same_rows(tmp_path, fmt):
+    rows = generate(tmp_path / f"vins.{fmt}", fmt).read_text().splitlines()
+    if fmt == "csv":
+        rows = [row["vin"] for row in csv.DictReader(rows)]
+    elif fmt == "ndjson":
+        rows = [json.loads(row)["vin"] for row in rows]
+    assert rows == generate(tmp_path / "reference.txt", "txt").read_text().split()
+    assert len(rows) == 2500
+
+
+def test_parquet_output(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    table = pq.read_table(generate(tmp_path / "vins.parquet", "parquet"))
+    assert table.num_rows == 2500
+    assert set(table.column("make").to_pylist()) == {"Ford", "Tesla"}
+    assert max(table.column("model_year").to_pylist()) <= 2025
+
+
+def test_cli_reports_the_seed_and_last_year():
+    def run(*args):
+        result = subprocess.run([sys.executable, "vin_bulk.py", "-n", "50", *args], capture_output=True,
+                                text=True, check=True, cwd=HERE)
+        return result.stdout, result.stderr
+
+    out, err = run("--seed", "9", "--last-year", "2001")
+    assert "seed: 9, last year: 2001" in err
+    assert out == run("--seed", "9", "--last-year", "2001")[0]
+    assert all(decode(vin).model_year <= 2001 for vin in out.split())
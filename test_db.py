@@ -0,0 +1,48 @@
+# test_db.py
+# SQLite backend: batched inserts, text-file import and uniform random
+# draws even for a make scattered thinly across the rowid space.
+import random
+from collections import Counter
+
+from conftest import make_vins
+from vin_db import VinDatabase, vin_row
+
+
+def test_adds_are_batched_and_duplicates_ignored(tmp_path):
+    db = VinDatabase(str(tmp_path / "vins.db"), batch_size=3, flush_interval=3600)
+    vins = make_vins("Ford", 3)
+    db.add(vins[0], "Ford")
+    db.add(vins[1], "Ford")
+    assert db.count() == 0
+    db.add(vins[2], "Ford")
+    assert db.count("Ford") == 3
+    assert db.add_many([vin_row(vin, "Ford") for vin in vins]) == 0
+    db.close()
+
+
+def test_import_text_files_skips_malformed_lines_and_is_idempotent(tmp_path):
+    vins = make_vins("Tesla", 5)
+    (tmp_path / "make_Tesla.txt").write_text("\n".join(vins[:3] + ["short", ""] + vins[3:]) + "\n")
+    (tmp_path / "make_name.txt").write_text("Tesla\n")
+    db = VinDatabase(str(tmp_path / "vins.db"))
+    assert db.import_text_files(str(tmp_path)) == 5
+    assert db.import_text_files(str(tmp_path)) == 0
+    assert db.makes() == ["Tesla"]
+    assert [vin for vins in db.iter_vins(chunk_size=2) for vin in vins] == vins
+    db.close()
+
+
+def test_random_vin_is_uniform_for_a_sparse_make(tmp_path):
+    # Five Audi rows at each end of a span of Ford rows: a "next row after a
+    # random rowid" draw would return the sixth Audi VIN almost every time
+    db = VinDatabase(str(tmp_path / "vins.db"))
+    audi, ford = make_vins("Audi", 10), make_vins("Ford", 990)
+    db.add_many([vin_row(vin, "Audi") for vin in audi[:5]] + [vin_row(vin, "Ford") for vin in ford]
+                + [vin_row(vin, "Audi") for vin in audi[5:]])
+
+    draws = Counter(db.random_vins("Audi", 5000, random.Random(1)))
+    assert set(draws) == set(audi)
+    assert max(draws.values()) < 650  # 500 expected per VIN
+    assert db.random_vin("Bugatti") is None
+    assert db.random_vins("Bugatti", 3) == []
+    db.close()
@@ -0,0 +1,61 @@
+# test_decoder.py
+# decode() and decode_many() agree field for field, both normalise their
+# input, and plants are looked up by make and region.
+import numpy as np
+import pytest
+
+from conftest import make_vins
+from vin_decoder import NO_CHECK_DIGIT, NO_YEAR, decode, decode_many
+
+FIELDS = ("vin", "valid", "check_digit", "wmi", "vds", "vis", "make", "region", "model_year",
+          "plant_code", "plant", "serial")
+
+
+def as_python(value):
+    return value.decode() if isinstance(value, bytes) else value.item() if hasattr(value, "item") else value
+
+
+def assert_agree(vins):
+    columns = decode_many(np.array(vins))
+    for row, vin in enumerate(vins):
+        single = decode(vin)
+        for field in FIELDS:
+            assert as_python(columns[field][row]) == getattr(single, field), (vin, field)
+
+
+def test_decode_many_agrees_with_decode():
+    vins = [vin for make in ("Ford", "Tesla", "Audi", "Toyota") for vin in make_vins(make, 25)]
+    vins += ["1FTFW1ET5DFC10312", "WF0AXXWPMAFC12345", "1FTFW1ETIDFC10312", "ZZZ00000000000000"]
+    assert_agree(vins)
+
+
+def test_input_is_normalised_like_decode():
+    messy = [" 1ftfw1et5dfc10312 ", "5yj3e1ea7kf317000\n"]
+    assert_agree(messy)
+    assert decode_many(np.array(messy))["vin"].tolist() == [b"1FTFW1ET5DFC10312", b"5YJ3E1EA7KF317000"]
+    assert decode_many(np.array(messy, dtype="S"))["valid"].tolist() == [decode(vin).valid for vin in messy]
+
+
+def test_unknown_model_year_is_the_same_in_both():
+    vin = "1FTFW1ET5UFC10312"  # U is not a year code
+    assert decode(vin).model_year == NO_YEAR
+    assert decode_many(np.array([vin]))["model_year"].tolist() == [NO_YEAR]
+    assert decode("1FT").model_year == NO_YEAR
+
+
+def test_illegal_characters_have_no_check_digit():
+    vins = ["1FTFW1ETIDFC10312", "1FTFW1ET5DFC1031"]  # I is never used; one short
+    assert [decode(vin).check_digit for vin in vins] == [NO_CHECK_DIGIT] * 2
+    assert decode_many(np.array(vins))["check_digit"].tolist() == [NO_CHECK_DIGIT.encode()] * 2
+
+
+@pytest.mark.parametrize("vin, plant", [
+    ("1FTFW1ET5DFC10312", "Dearborn, MI"),   # Ford, North America
+    ("WF0AXXWPMAFC12345", None),             # Ford Germany: not a US plant
+    ("MAJ6S3KL0KFC12345", None),             # Ford India
+    ("5YJ3E1EA7KF317000", "Fremont, CA"),    # Tesla codes are global
+    ("LRW3E7FA0LC000000", "Shanghai, China"),
+])
+def test_plants_are_keyed_by_make_and_region(vin, plant):
+    assert decode(vin).plant == plant
+    assert decode_many(np.array([vin]))["plant"].tolist() == [plant]
@@ -0,0 +1,72 @@
+# test_dedupe.py
+# The persistent Bloom filter: add_many (NumPy) and add (scalar) set the
+# same bits, a saved filter is reloaded only while it matches the corpus,
+# and on the sqlite backend the database's VINs are in it too.
+import numpy as np
+
+from conftest import make_vins
+from vin_db import VinDatabase, vin_row
+from vin_dedupe import VinDeduper, read_vin_chunks
+
+
+def write_make(tmp_path, make, vins):
+    with open(tmp_path / f"make_{make}.txt", "a") as f:
+        f.write("".join(vin + "\n" for vin in vins))
+
+
+def test_vectorised_and_scalar_hashing_agree(tmp_path):
+    vins = make_vins("Ford", 500)
+    scalar = VinDeduper(str(tmp_path / "a"), capacity=1000)
+    vectorised = VinDeduper(str(tmp_path / "b"), capacity=1000)
+    for vin in vins:
+        assert scalar.add(vin)
+    vectorised.add_many(np.array(vins, dtype="S17"))
+    assert np.array_equal(scalar.bits, vectorised.bits)
+    assert scalar.count == vectorised.count == 500
+    assert not any(vectorised.add(vin) for vin in vins)
+
+
+def test_saved_filter_is_reloaded_until_the_corpus_changes(tmp_path):
+    vins = make_vins("Ford", 100)
+    write_make(tmp_path, "Ford", vins[:50])
+    deduper = VinDeduper(str(tmp_path), capacity=1000)
+    assert deduper.count == 50
+    deduper.add(vins[50])
+    write_make(tmp_path, "Ford", vins[50:51])
+    deduper.save()
+
+    reloaded = VinDeduper(str(tmp_path), capacity=1000)
+    assert reloaded.count == 51
+    assert vins[50] in reloaded
+
+    # Appended behind the filter's back: the header no longer matches
+    write_make(tmp_path, "Ford", vins[51:])
+    rebuilt = VinDeduper(str(tmp_path), capacity=1000)
+    assert rebuilt.count == 100
+    assert all(vin in rebuilt for vin in vins)
+
+
+def test_read_vin_chunks_handles_lines_across_chunk_edges(tmp_path):
+    vins = make_vins("Tesla", 40)
+    write_make(tmp_path, "Tesla", vins[:20])
+    with open(tmp_path / "make_Tesla.txt", "a") as f:
+        f.write("garbage\n\n")
+    write_make(tmp_path, "Tesla", vins[20:])
+    chunks = list(read_vin_chunks(tmp_path / "make_Tesla.txt", chunk_bytes=25))
+    assert [vin.decode() for chunk in chunks for vin in chunk] == vins
+
+
+def test_sqlite_backend_seeds_the_filter_from_the_database(tmp_path):
+    db = VinDatabase(str(tmp_path / "vins.db"))
+    vins = make_vins("Audi", 300)
+    db.add_many([vin_row(vin, "Audi") for vin in vins])
+
+    deduper = VinDeduper(str(tmp_path), capacity=1000, db=db)
+    assert deduper.count == 300
+    assert all(vin in deduper for vin in vins)
+
+    # A row added since the last save makes the saved filter stale
+    extra = make_vins("Audi", 301)[-1]
+    db.add_many([vin_row(extra, "Audi")])
+    assert VinDeduper(str(tmp_path), capacity=1000, db=db).count == 301
+    db.close()
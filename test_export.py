@@ -0,0 +1,112 @@
+# test_export.py
+# VinExporter: incremental exports write one part per run with matching
+# summary counts, and compaction (including one that died before removing
+# its sources) leaves every VIN exactly once.
+import os
+import shutil
+from collections import Counter
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from conftest import make_vins
+from vin_decoder import decode
+from vin_export import VinExporter, load_summary, summary_totals
+
+
+def append(data_dir, make, vins):
+    with open(os.path.join(data_dir, f"make_{make}.txt"), "a") as f:
+        f.writelines(vin + "\n" for vin in vins)
+
+
+def exported_vins(exporter, make):
+    vins = []
+    for part in exporter.parts(make):
+        vins += exporter.pq.read_table(part, schema=exporter.schema).column("vin").to_pylist()
+    return vins
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    data_dir, export_dir = tmp_path / "vin_data", tmp_path / "parquet"
+    data_dir.mkdir()
+    return str(data_dir), str(export_dir)
+
+
+def test_export_is_incremental_and_summarised(dirs):
+    data_dir, export_dir = dirs
+    ford, tesla = make_vins("Ford", 120, seed=1), make_vins("Tesla", 80, seed=2)
+    append(data_dir, "Ford", ford[:100])
+    append(data_dir, "Tesla", tesla)
+    exporter = VinExporter(data_dir, export_dir, chunk_size=32)
+    assert exporter.export() == 180
+    assert exporter.export() == 0
+    append(data_dir, "Ford", ford[100:])
+    assert exporter.export() == 20
+
+    assert len(exporter.parts("Ford")) == 2
+    assert exported_vins(exporter, "Ford") == ford
+    summary = load_summary(export_dir)
+    assert summary["makes"]["Ford"]["count"] == 120
+    years = Counter(str(decode(vin).model_year) for vin in ford)
+    assert summary["makes"]["Ford"]["model_years"] == years
+    assert summary_totals(summary)["count"] == 200
+    assert summary_totals(summary)["invalid"] == 0
+    assert [count for _, count in summary["history"]] == [180, 180, 200]
+
+
+def test_a_replaced_make_file_is_exported_again(dirs):
+    data_dir, export_dir = dirs
+    ford = make_vins("Ford", 50, seed=1)
+    append(data_dir, "Ford", ford)
+    exporter = VinExporter(data_dir, export_dir)
+    exporter.export()
+    path = os.path.join(data_dir, "make_Ford.txt")
+    with open(path + ".new", "w") as f:
+        f.writelines(vin + "\n" for vin in ford[:20])
+    os.replace(path + ".new", path)
+    assert exporter.export() == 20
+    assert exported_vins(exporter, "Ford") == ford[:20]
+    assert exporter.summary["makes"]["Ford"]["count"] == 20
+
+
+def test_compact_merges_parts(dirs):
+    data_dir, export_dir = dirs
+    ford = make_vins("Ford", 90, seed=1)
+    exporter = VinExporter(data_dir, export_dir)
+    for start in range(0, 90, 30):
+        append(data_dir, "Ford", ford[start:start + 30])
+        exporter.export()
+    assert exporter.compact("Ford") == 3
+    assert [os.path.basename(part) for part in exporter.parts("Ford")] == ["part-000000000-000000090.parquet"]
+    assert exported_vins(exporter, "Ford") == ford
+    assert exporter.compact("Ford") == 0
+
+
+def test_parts_left_by_an_interrupted_compaction_are_dropped(dirs):
+    data_dir, export_dir = dirs
+    ford, more = make_vins("Ford", 60, seed=1), make_vins("Ford", 10, seed=2)
+    exporter = VinExporter(data_dir, export_dir)
+    for start in (0, 30):
+        append(data_dir, "Ford", ford[start:start + 30])
+        exporter.export()
+    saved = os.path.join(export_dir, "saved")
+    shutil.copytree(os.path.join(export_dir, "make=Ford"), saved)
+    exporter.compact("Ford")
+    # As if compaction died after renaming the merged part into place
+    for name in os.listdir(saved):
+        shutil.copy(os.path.join(saved, name), os.path.join(export_dir, "make=Ford", name))
+    assert len(exporter.parts("Ford")) == 3
+
+    append(data_dir, "Ford", more)
+    assert exporter.export() == 10
+    assert exported_vins(exporter, "Ford") == ford + more
+    assert sorted(os.path.basename(part) for part in exporter.parts("Ford")) == [
+        "part-000000000-000000060.parquet", "part-000000060-000000070.parquet"]
+
+    # compact() clears them up itself too
+    for name in os.listdir(saved):
+        shutil.copy(os.path.join(saved, name), os.path.join(export_dir, "make=Ford", name))
+    assert exporter.compact("Ford") == 2
+    assert exported_vins(exporter, "Ford") == ford + more
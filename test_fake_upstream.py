@@ -0,0 +1,52 @@
+# test_fake_upstream.py
+# The local randomvin.com stand-in: real VINs follow the configured WMI mix
+# and unknown-WMI share, errors come at the configured rate, and the
+# collector benchmark runs end to end against it.
+import asyncio
+
+from bench_collector import run_benchmark
+from fake_upstream import FakeUpstream, UpstreamConfig, start_server
+from upstream import UpstreamClient
+from vin_validator import is_valid_vin
+from wmi_registry import WMI_REGISTRY, classify
+
+
+def test_real_vins_follow_the_wmi_mix():
+    mix = {make: 0 for make in WMI_REGISTRY}
+    mix["Ford"] = 1
+    upstream = FakeUpstream(UpstreamConfig(unknown_rate=0.1, wmi_mix=mix, seed=1))
+    vins = [upstream.real_vin() for _ in range(2000)]
+    assert all(is_valid_vin(vin) for vin in vins)
+    unknown = sum(classify(vin) != "Ford" for vin in vins) / len(vins)
+    assert 0.06 < unknown < 0.14
+
+
+def test_fake_vins_fail_the_check_digit_about_half_the_time():
+    upstream = FakeUpstream(UpstreamConfig(seed=2))
+    invalid = sum(not is_valid_vin(upstream.fake_vin()) for _ in range(2000)) / 2000
+    assert 0.4 < invalid < 0.6
+
+
+def test_client_retries_through_server_errors():
+    async def scenario():
+        config = UpstreamConfig(latency_ms=1, latency_sigma=0, error_rate=0.3, seed=3)
+        runner, url = await start_server(config)
+        try:
+            async with UpstreamClient(url, retries=10, backoff_base=0.001, backoff_cap=0.01) as client:
+                return [await client.fetch(hedge=False) for _ in range(30)]
+        finally:
+            await runner.cleanup()
+
+    # 503s are retried away; the HTML error page is a 200, which only the
+    # collector's validation can reject
+    bodies = asyncio.run(scenario())
+    assert all(is_valid_vin(body) or body.startswith("<html>") for body in bodies)
+    assert sum(map(is_valid_vin, bodies)) > 15
+
+
+def test_collector_benchmark_runs_end_to_end():
+    config = UpstreamConfig(latency_ms=2, latency_sigma=0, seed=4)
+    result = asyncio.run(run_benchmark(0.5, 4, None, config))
+    assert result["fetched"] > 0
+    assert result["saved"] + result["rejected"] == result["fetched"]
+    assert result["upstream"]["requests"] >= result["fetched"]
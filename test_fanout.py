@@ -0,0 +1,63 @@
+# test_fanout.py
+# Speculative fan-out: the batch size follows the learned hit rate, the
+# first match wins and cancels the rest, and the attempt budget holds.
+import asyncio
+import random
+
+from vin_fanout import HitRateTracker, fanout_size, fetch_matching_vin
+
+
+def test_fanout_size_grows_as_the_hit_rate_falls():
+    assert fanout_size(1.0, 0.1, 2.0) == 1
+    common, rare = fanout_size(0.5, 1.0, 1.0), fanout_size(0.01, 1.0, 1.0)
+    assert common < rare <= 64
+    # More rounds fit in the target latency, so fewer requests per round
+    assert fanout_size(0.01, 0.1, 2.0) < rare
+
+
+def test_hit_rate_learns_from_all_traffic():
+    tracker = HitRateTracker(prior_rate=0.01, prior_weight=20)
+    for _ in range(80):
+        tracker.observe("1FTFW1ET5DFC10312", 0.1)
+    for _ in range(20):
+        tracker.observe("JTDBK1GG0D2000000", 0.1)
+    assert abs(tracker.hit_rate(("1F", "2F")) - (80 + 0.2) / 120) < 1e-9
+    assert tracker.hit_rate("5YJ") < 0.01
+
+
+def test_first_match_wins_and_cancels_the_rest():
+    async def scenario():
+        rng = random.Random(0)
+        started, cancelled = [], []
+
+        async def fetch():
+            started.append(1)
+            try:
+                await asyncio.sleep(rng.uniform(0.01, 0.05))
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+            return "5YJ3E1EA7KF317000\n" if rng.random() < 0.2 else "1FTFW1ET5DFC10312\n"
+
+        tracker = HitRateTracker()
+        vin = await fetch_matching_vin(fetch, ("5YJ",), tracker, target_latency=0.05)
+        await asyncio.sleep(0)
+        return vin, len(started), len(cancelled), tracker.total
+
+    vin, started, cancelled, observed = asyncio.run(scenario())
+    assert vin == "5YJ3E1EA7KF317000"
+    assert cancelled > 0 and observed + cancelled == started
+
+
+def test_gives_up_after_the_attempt_budget():
+    async def scenario():
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return "1FTFW1ET5DFC10312"
+
+        vin = await fetch_matching_vin(fetch, "5YJ", HitRateTracker(), max_attempts=30)
+        return vin, len(calls)
+
+    assert asyncio.run(scenario()) == (None, 30)
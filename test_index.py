@@ -0,0 +1,154 @@
+# test_index.py
+# VinIndex: queries match a brute-force decode of the corpus, refresh picks
+# up appends and replaced files, and saved delta segments reload to the
+# same index however the last save ended.
+import glob
+import os
+import random
+
+import numpy as np
+import pytest
+
+from conftest import make_vins
+from vin_decoder import decode
+from vin_index import DELTA_PATTERN, INDEX_NAME, MERGE_SEGMENTS, VinIndex, remove_index
+
+
+def append(data_dir, make, vins):
+    with open(os.path.join(data_dir, f"make_{make}.txt"), "a") as f:
+        f.writelines(vin + "\n" for vin in vins)
+
+
+def corpus(data_dir):
+    vins = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, "make_*.txt"))):
+        make = os.path.basename(path)[len("make_"):-len(".txt")]
+        with open(path) as f:
+            vins[make] = f.read().split()
+    return vins
+
+
+def expected(data_dir, make=None, wmi=None, years=None, plant=None):
+    if isinstance(years, int):
+        years = (years, years)
+    matches = set()
+    for file_make, vins in corpus(data_dir).items():
+        for vin in vins:
+            decoded = decode(vin)
+            if ((make is None or file_make == make) and (wmi is None or decoded.wmi == wmi)
+                    and (years is None or years[0] <= decoded.model_year <= years[1])
+                    and (plant is None or decoded.plant_code == plant)):
+                matches.add(vin)
+    return matches
+
+
+def matching(index, **filters):
+    return {index.vin(vin_id) for vin_id in index.query(**filters)}
+
+
+def snapshot(index):
+    return (index.files, index.counts,
+            {field: {key: ids.tolist() for key, ids in postings.items()} for field, postings in index.postings.items()})
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    append(tmp_path, "Ford", make_vins("Ford", 200, seed=1))
+    append(tmp_path, "Tesla", make_vins("Tesla", 150, seed=2))
+    return str(tmp_path)
+
+
+def test_queries_match_a_brute_force_scan(data_dir):
+    index = VinIndex.open(data_dir)
+    some = decode(corpus(data_dir)["Ford"][0])
+    filters = [{}, {"make": "Ford"}, {"make": "Audi"}, {"wmi": some.wmi}, {"years": some.model_year},
+               {"make": "Tesla", "years": (2010, 2020)}, {"plant": some.plant_code},
+               {"make": "Ford", "wmi": some.wmi, "years": (1990, 2025), "plant": some.plant_code}]
+    for query in filters:
+        want = expected(data_dir, **query)
+        assert matching(index, **query) == want, query
+        assert index.count(**query) == len(want)
+    assert index.sample(random.Random(0), make="Ford") in corpus(data_dir)["Ford"]
+    assert index.sample(make="Audi") is None
+    index.close()
+
+
+def test_refresh_indexes_appends_and_replaced_files(data_dir):
+    index = VinIndex.open(data_dir)
+    assert index.count(make="Ford") == 200
+    assert index.refresh() == 0
+
+    append(data_dir, "Ford", make_vins("Ford", 30, seed=3))
+    assert index.count(make="Ford") == 200  # cached until refreshed
+    assert index.refresh() == 30
+    assert matching(index, make="Ford") == set(corpus(data_dir)["Ford"])
+
+    # A rewritten file (new inode, fewer records) is indexed from scratch
+    path = os.path.join(data_dir, "make_Tesla.txt")
+    kept = corpus(data_dir)["Tesla"][:40]
+    with open(path + ".new", "w") as f:
+        f.writelines(vin + "\n" for vin in kept)
+    os.replace(path + ".new", path)
+    assert index.refresh() == 40
+    assert matching(index, make="Tesla") == set(kept)
+    assert matching(index) == expected(data_dir)
+    index.close()
+
+
+def test_saves_write_deltas_and_merge_into_the_base(data_dir):
+    index = VinIndex.open(data_dir)
+    index.save()
+    assert os.path.exists(os.path.join(data_dir, INDEX_NAME))
+    for round_no in range(MERGE_SEGMENTS):
+        append(data_dir, "Ford", make_vins("Ford", 5, seed=10 + round_no))
+        index.refresh()
+        index.save()
+        deltas = glob.glob(os.path.join(data_dir, DELTA_PATTERN))
+        assert len(deltas) == round_no + 1
+        assert snapshot(VinIndex.open(data_dir)) == snapshot(index)
+
+    append(data_dir, "Tesla", make_vins("Tesla", 5, seed=99))
+    index.refresh()
+    index.save()  # MERGE_SEGMENTS deltas: merged into a new base
+    assert glob.glob(os.path.join(data_dir, DELTA_PATTERN)) == []
+    reloaded = VinIndex.open(data_dir)
+    assert snapshot(reloaded) == snapshot(index)
+    assert matching(reloaded) == expected(data_dir)
+
+
+def test_deltas_left_by_a_crashed_merge_are_not_applied_twice(data_dir):
+    index = VinIndex.open(data_dir)
+    index.save()
+    append(data_dir, "Ford", make_vins("Ford", 5, seed=5))
+    index.refresh()
+    index.save()
+    stale = {path: open(path, "rb").read() for path in glob.glob(os.path.join(data_dir, DELTA_PATTERN))}
+    assert stale
+
+    # Replacing a file forces a base rewrite; then put the deltas it
+    # removed back, as if the save died right after writing the base
+    path = os.path.join(data_dir, "make_Tesla.txt")
+    with open(path + ".new", "w") as f:
+        f.writelines(vin + "\n" for vin in corpus(data_dir)["Tesla"][:10])
+    os.replace(path + ".new", path)
+    index.refresh()
+    index.save()
+    for delta, data in stale.items():
+        with open(delta, "wb") as f:
+            f.write(data)
+
+    reloaded = VinIndex.open(data_dir)
+    assert snapshot(reloaded) == snapshot(index)
+    assert all(len(ids) == len(np.unique(ids)) for postings in reloaded.postings.values()
+               for ids in postings.values())
+
+
+def test_remove_index_deletes_the_base_and_deltas(data_dir):
+    index = VinIndex.open(data_dir)
+    index.save()
+    append(data_dir, "Ford", make_vins("Ford", 5, seed=5))
+    index.refresh()
+    index.save()
+    remove_index(data_dir)
+    assert not os.path.exists(os.path.join(data_dir, INDEX_NAME))
+    assert glob.glob(os.path.join(data_dir, DELTA_PATTERN)) == []
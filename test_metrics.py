@@ -0,0 +1,73 @@
+# test_metrics.py
+# Metrics in the Prometheus text format: label checks, cumulative histogram
+# buckets, re-registration, the /metrics endpoint, and the collector's
+# counters as VINs are handled.
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from conftest import make_vins
+from vin_generator import generate_vin
+from vin_metrics import CONTENT_TYPE, Registry, create_app
+
+
+def test_counters_check_their_labels():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ["result"])
+    requests.inc(result="ok")
+    requests.inc(2, result="ok")
+    assert requests.value(result="ok") == 3
+    with pytest.raises(ValueError):
+        requests.inc(status="ok")
+    assert 'requests_total{result="ok"} 3' in registry.render()
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        latency.observe(value)
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_count 4" in lines
+
+
+def test_registering_twice_returns_the_same_metric():
+    registry = Registry()
+    assert registry.counter("a_total", "A") is registry.counter("a_total", "A")
+    with pytest.raises(ValueError):
+        registry.gauge("a_total", "A")
+    registry.gauge("backlog", "Backlog", function=lambda: 7)
+    assert "backlog 7" in registry.render().splitlines()
+
+
+def test_metrics_endpoint_serves_the_text_format():
+    registry = Registry()
+    registry.counter("hits_total", "Hits").inc()
+
+    async def scenario():
+        async with TestClient(TestServer(create_app(registry))) as client:
+            response = await client.get("/metrics")
+            return response.headers["Content-Type"], await response.text()
+
+    content_type, body = asyncio.run(scenario())
+    assert content_type == CONTENT_TYPE
+    assert "# TYPE hits_total counter" in body and "hits_total 1" in body
+
+
+def test_collector_counts_each_outcome(collector):
+    def count(result):
+        return collector.VINS.value(result=result)
+
+    before = {result: count(result) for result in ("saved", "duplicate", "invalid", "unknown_wmi")}
+    vin = make_vins("Ford", 1)[0]
+    collector.handle_vin(vin)
+    collector.handle_vin(vin)
+    collector.handle_vin("garbage")
+    collector.handle_vin(generate_vin("ZZZ"))
+    after = {result: count(result) - before[result] for result in before}
+    assert after == {"saved": 1, "duplicate": 1, "invalid": 1, "unknown_wmi": 1}
+    assert collector.ACCEPTED.value(make="Ford") >= 1
@@ -0,0 +1,57 @@
+# test_quota.py
+# Quota-driven collection: targets start from what is already stored, only
+# valid VINs count as fetches, full makes overflow up to the cap, and
+# collection is done once every target is met.
+import argparse
+import math
+
+import pytest
+
+from conftest import make_vins
+from vin_quota import QuotaTracker, format_eta, parse_quota, stored_counts
+
+
+def test_parse_quota():
+    assert parse_quota("Ford=3, Tesla=1") == {"Ford": 3, "Tesla": 1}
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_quota("Trabant=1")
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_quota("Ford=many")
+
+
+def test_stored_counts_are_whole_records(tmp_path):
+    (tmp_path / "make_Ford.txt").write_text("".join(vin + "\n" for vin in make_vins("Ford", 4)) + "1FT")
+    (tmp_path / "make_name.txt").write_text("Ford\n")
+    assert stored_counts(str(tmp_path)) == {"Ford": 4}
+
+
+def test_tracker_overflows_full_makes_up_to_the_cap():
+    quota = QuotaTracker({"Ford": 2, "Tesla": 1}, initial={"Ford": 1}, overflow_cap=1)
+    assert quota.remaining() == {"Ford": 1, "Tesla": 1}
+    quota.record("Ford")
+    assert not quota.wants("Ford") and not quota.wants("Audi")
+    assert quota.take_overflow("Ford") and not quota.take_overflow("Ford")
+    assert quota.dropped == 1
+    assert quota.bottlenecks() == ["Tesla"]
+    quota.record("Tesla")
+    assert quota.done() and quota.progress() == 1.0 and quota.eta() == 0.0
+    assert format_eta(math.inf) == "unknown" and format_eta(3725) == "1h02m"
+
+
+def test_collector_counts_the_stored_corpus_and_only_valid_fetches(collector, tmp_path):
+    vins = make_vins("Ford", 4)
+    store = collector.get_store()
+    store.add(vins[0], "Ford")
+    store.add(vins[1], "Ford")
+    collector.flush_storage()
+
+    quota = collector.start_quota({"Ford": 3}, overflow_cap=1)
+    assert quota.remaining() == {"Ford": 1}
+    collector.handle_vin("<html><body>Database error</body></html>")
+    assert quota.fetched == 0
+    collector.handle_vin(vins[2])
+    collector.handle_vin(vins[3])
+    assert quota.fetched == 2 and quota.done()
+    assert sum(quota.overflow.values()) == 1
+    collector.flush_storage()
+    assert (tmp_path / "overflow" / "make_Ford.txt").read_text().split() == [vins[3]]
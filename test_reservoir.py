@@ -0,0 +1,71 @@
+# test_reservoir.py
+# Background-refilled VIN pools: stored sources keep pools topped up while
+# a slow fallback source is busy, and a pool never holds a VIN twice.
+import threading
+import time
+
+from vin_reservoir import VinReservoir
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def numbered(make, count):
+    return [f"{make}-{i}" for i in range(count)]
+
+
+def test_pools_fill_to_capacity_and_refill_after_pops():
+    reservoir = VinReservoir(["A", "B"], [numbered], capacity=20, low_water=5, idle_wait=0.01)
+    try:
+        wait_for(lambda: reservoir.stats()["pools"] == {"A": 20, "B": 20})
+        vins = [reservoir.pop("A") for _ in range(16)]
+        assert len(set(vins)) == 16
+        wait_for(lambda: reservoir.stats()["pools"]["A"] == 20)
+        assert reservoir.stats()["served"] == 16
+    finally:
+        reservoir.stop()
+
+
+def test_repeated_vins_are_held_once():
+    reservoir = VinReservoir(["A"], [lambda make, count: ["A-1", "A-2"] * count], capacity=10,
+                             low_water=5, idle_wait=0.01, retry_delay=3600)
+    try:
+        wait_for(lambda: reservoir.stats()["pools"]["A"] == 2)
+        assert {reservoir.pop("A"), reservoir.pop("A")} == {"A-1", "A-2"}
+        assert reservoir.pop("A") is None
+        assert reservoir.stats()["misses"] == 1
+    finally:
+        reservoir.stop()
+
+
+def test_slow_fallback_does_not_hold_up_stored_refills():
+    release = threading.Event()
+    calls = []
+
+    def stored(make, count):
+        return [] if make == "Empty" else numbered(make, count)
+
+    def upstream(make, count):
+        calls.append(make)
+        release.wait(5)
+        return [f"{make}-upstream"]
+
+    reservoir = VinReservoir(["A", "Empty"], [stored], fallback_sources=[upstream], capacity=10,
+                             low_water=5, idle_wait=0.01, retry_delay=3600)
+    try:
+        wait_for(lambda: calls == ["Empty"])
+        wait_for(lambda: reservoir.stats()["pools"]["A"] == 10)
+        for _ in range(8):
+            reservoir.pop("A")
+        # The fallback thread is still blocked on "Empty"
+        wait_for(lambda: reservoir.stats()["pools"]["A"] == 10)
+        release.set()
+        wait_for(lambda: reservoir.stats()["pools"]["Empty"] == 1)
+        assert "A" not in calls
+    finally:
+        release.set()
+        reservoir.stop()
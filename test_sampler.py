@@ -0,0 +1,72 @@
+# test_sampler.py
+# mmap sampling from make files: appends are picked up, malformed files
+# fall back to parsing lines, and a file replaced under concurrent readers
+# is swapped in without any reader seeing a closed map.
+import os
+import random
+import threading
+
+from conftest import make_vins
+from vin_sampler import VinSampler, sample_vin
+
+
+def write(path, vins, mode="w"):
+    with open(path, mode) as f:
+        f.write("".join(vin + "\n" for vin in vins))
+
+
+def test_samples_every_record_and_follows_appends(tmp_path):
+    path = tmp_path / "make_Ford.txt"
+    vins = make_vins("Ford", 20)
+    write(path, vins[:10])
+    sampler = VinSampler(str(path))
+    rng = random.Random(0)
+    assert {sampler.sample(rng) for _ in range(500)} == set(vins[:10])
+    write(path, vins[10:], "a")
+    assert {sampler.sample(rng) for _ in range(1000)} == set(vins)
+    sampler.close()
+
+
+def test_malformed_lines_fall_back_to_parsing(tmp_path):
+    path = tmp_path / "make_Ford.txt"
+    vins = make_vins("Ford", 5)
+    path.write_text("\n".join(["short"] + vins + ["  " + vins[0] + "  "]) + "\n")
+    rng = random.Random(0)
+    sampler = VinSampler(str(path))
+    assert {sampler.sample(rng) for _ in range(300)} == set(vins)
+    sampler.close()
+
+
+def test_empty_file_samples_nothing(tmp_path):
+    path = tmp_path / "make_Ford.txt"
+    path.write_text("")
+    assert sample_vin(str(path)) is None
+
+
+def test_replaced_file_is_swapped_in_under_concurrent_readers(tmp_path):
+    path = tmp_path / "make_Ford.txt"
+    old, new = make_vins("Ford", 3, seed=1), make_vins("Ford", 3, seed=2)
+    write(path, old)
+    sampler = VinSampler(str(path))
+    errors, stop = [], threading.Event()
+
+    def read():
+        while not stop.is_set():
+            try:
+                assert sampler.sample() in old + new
+            except Exception as e:
+                errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for i in range(200):
+        write(str(path) + ".tmp", new if i % 2 else old)
+        os.replace(str(path) + ".tmp", path)
+    stop.set()
+    for reader in readers:
+        reader.join()
+
+    assert errors == []
+    assert {sampler.sample() for _ in range(100)} <= set(new)
+    sampler.close()
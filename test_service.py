@@ -0,0 +1,71 @@
+# test_service.py
+# The HTTP VIN service against a scratch vin_data/: batch and stream
+# endpoints, query validation, and seeded draws that repeat exactly.
+import asyncio
+import json
+import random
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from conftest import make_vins
+from vin_service import VinService, create_app
+
+
+def write_corpus(tmp_path):
+    corpus = {make: make_vins(make, 50) for make in ("Ford", "Audi", "Tesla")}
+    for make, vins in corpus.items():
+        (tmp_path / f"make_{make}.txt").write_text("".join(vin + "\n" for vin in vins))
+    return corpus
+
+
+def serve(tmp_path, scenario):
+    async def run():
+        async with TestClient(TestServer(create_app(str(tmp_path), "files"))) as client:
+            return await scenario(client)
+    return asyncio.run(run())
+
+
+def test_batch_endpoint_serves_stored_vins(tmp_path):
+    corpus = write_corpus(tmp_path)
+
+    async def scenario(client):
+        response = await client.get("/vin", params={"make": "Audi", "count": "20"})
+        assert response.status == 200
+        body = await response.json()
+        assert body["count"] == 20 and set(body["vins"]) <= set(corpus["Audi"])
+        fake = await (await client.get("/vin", params={"type": "fake", "count": "5"})).json()
+        assert len(fake["vins"]) == 5
+        for params in ({"make": "Trabant"}, {"count": "0"}, {"count": "x"}, {"type": "other"}):
+            assert (await client.get("/vin", params=params)).status == 400
+
+    serve(tmp_path, scenario)
+
+
+def test_stream_reads_make_weights_once(tmp_path, monkeypatch):
+    corpus = write_corpus(tmp_path)
+    reads = []
+    stored_counts = VinService._stored_counts
+    monkeypatch.setattr(VinService, "_stored_counts", lambda self: reads.append(1) or stored_counts(self))
+
+    async def scenario(client):
+        response = await client.get("/vin/stream", params={"count": "2500"})
+        return [json.loads(line)["vin"] for line in (await response.text()).splitlines()]
+
+    vins = serve(tmp_path, scenario)
+    assert len(vins) == 2500
+    assert set(vins) <= {vin for vins in corpus.values() for vin in vins}
+    assert len(reads) == 1
+
+
+def test_seeded_mixed_draws_repeat(tmp_path):
+    write_corpus(tmp_path)
+
+    async def draw():
+        service = VinService(str(tmp_path), "files", rng=random.Random(7))
+        try:
+            return await service.real_vins(None, 200, allow_upstream=False)
+        finally:
+            for sampler in service.samplers.values():
+                sampler.close()
+
+    assert asyncio.run(draw()) == asyncio.run(draw())
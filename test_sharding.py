@@ -0,0 +1,42 @@
+# test_sharding.py
+# Sharded generation: output depends only on the seed, shard count and
+# chunk size, never on how many worker processes produced it or in what
+# order they finished.
+import io
+
+from vin_bulk import generate_to, plan_chunks
+
+
+class BytesSink:
+    def __init__(self):
+        self.out = io.BytesIO()
+
+    def write_chunk(self, chunk):
+        self.out.write(chunk)
+
+
+def generate(count=5000, **options):
+    sink = BytesSink()
+    generate_to(sink, ["Ford", "Tesla", "Audi"], count, "txt", seed=3, chunk_size=700, **options)
+    return sink.out.getvalue()
+
+
+def test_processes_do_not_change_the_output():
+    assert generate(shards=4, processes=1) == generate(shards=4, processes=3)
+
+
+def test_unordered_output_holds_the_same_rows():
+    ordered = generate(shards=4, processes=1).split()
+    unordered = generate(shards=4, processes=3, ordered=False).split()
+    assert sorted(unordered) == sorted(ordered)
+
+
+def test_shards_split_the_count_exactly():
+    tasks = list(plan_chunks(["Ford"], 1003, "txt", seed=1, shards=4, chunk_size=100))
+    assert sum(task[1] for task in tasks) == 1003
+    assert len(generate(count=1003, shards=4)) == 1003 * 18
+
+
+def test_seed_and_shard_count_select_the_output():
+    assert generate(shards=2) == generate(shards=2)
+    assert generate(shards=2) != generate(shards=3)
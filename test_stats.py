@@ -0,0 +1,81 @@
+# test_stats.py
+# VinStats: counts kept per write survive a reload, are reconciled with the
+# corpus after a missed save, and verify/rebuild compare against a scan.
+import os
+
+from conftest import make_vins
+from vin_generator import generate_vin
+from vin_stats import STATS_NAME, VinStats, malformed_files
+
+
+def append(data_dir, make, vins):
+    with open(os.path.join(data_dir, f"make_{make}.txt"), "a") as f:
+        f.writelines(vin + "\n" for vin in vins)
+
+
+def test_recorded_counts_survive_a_reload(tmp_path):
+    stats = VinStats(str(tmp_path), save_interval=3600)
+    stats.record_saved("Ford", now=100.0)
+    stats.record_saved("Ford", now=200.0)
+    stats.record_duplicate("Ford")
+    stats.record_unknown_wmi()
+    assert not os.path.exists(tmp_path / STATS_NAME)  # within the save interval
+    stats.save()
+
+    reloaded = VinStats(str(tmp_path))
+    assert reloaded.counts() == {"Ford": 2}
+    assert reloaded.makes["Ford"]["first_seen"] == 100.0
+    assert reloaded.makes["Ford"]["last_seen"] == 200.0
+    assert (reloaded.total(), reloaded.duplicates(), reloaded.unknown_wmi) == (2, 1, 1)
+
+
+def test_reconcile_trusts_the_corpus(tmp_path):
+    stats = VinStats(str(tmp_path))
+    for _ in range(3):
+        stats.record_saved("Ford")
+    stats.record_saved("Audi")
+    assert stats.reconcile({"Ford": 3, "Audi": 1}) == []
+    assert stats.reconcile({"Ford": 5, "Tesla": 2}) == ["Audi", "Ford", "Tesla"]
+    assert stats.counts() == {"Ford": 5, "Tesla": 2}
+    assert VinStats(str(tmp_path)).counts() == {"Ford": 5, "Tesla": 2}
+
+
+def test_verify_and_rebuild_against_the_files(tmp_path):
+    data_dir = str(tmp_path)
+    append(data_dir, "Ford", make_vins("Ford", 4))
+    append(data_dir, "Tesla", make_vins("Tesla", 2))
+    stats = VinStats(data_dir)
+    stats.record_saved("Ford")
+    stats.record_duplicate("Ford")
+    assert stats.verify() == {"Ford": (1, 4), "Tesla": (0, 2)}
+    stats.rebuild()
+    assert stats.verify() == {}
+    assert stats.counts() == {"Ford": 4, "Tesla": 2}
+    assert stats.duplicates() == 1  # traffic, not corpus: kept by a rebuild
+    assert malformed_files(data_dir) == []
+
+    with open(os.path.join(data_dir, "make_Tesla.txt"), "a") as f:
+        f.write(generate_vin("5YJ")[:9])  # torn tail
+    assert malformed_files(data_dir) == ["make_Tesla.txt"]
+    assert stats.verify() == {}  # whole records only
+
+
+def test_collector_reconciles_stats_a_crash_left_behind(collector, tmp_path):
+    vins = make_vins("Ford", 3)
+    for vin in vins[:2]:
+        collector.handle_vin(vin)
+    collector.flush_storage()
+    assert VinStats(str(tmp_path)).counts() == {"Ford": 2}
+
+    # The next VIN reaches the corpus but the process dies before the
+    # sidecar's next save
+    collector.get_stats().save_interval = 3600
+    collector.handle_vin(vins[2])
+    collector.get_store().flush()
+    collector.get_store().close()  # the store's own files, not the sidecar
+    collector.reset_storage()
+    assert VinStats(str(tmp_path)).counts() == {"Ford": 2}
+
+    assert collector.get_stats().counts() == {"Ford": 3}
+    collector.handle_vin(vins[0])
+    assert collector.get_stats().duplicates() == 1
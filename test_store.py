@@ -0,0 +1,60 @@
+# test_store.py
+# Write-behind VinStore: VINs are buffered until flush_size, flush_interval
+# or close, and make_name.txt lists a make before any of its VINs land.
+import threading
+
+import pytest
+
+from conftest import make_vins
+from vin_store import VinStore
+
+
+def lines(path):
+    return path.read_text().split() if path.exists() else []
+
+
+def test_vins_are_buffered_until_flush_size(tmp_path):
+    store = VinStore(str(tmp_path), flush_size=3, flush_interval=3600)
+    vins = make_vins("Ford", 3)
+    store.add(vins[0], "Ford")
+    store.add(vins[1], "Ford")
+    assert lines(tmp_path / "make_Ford.txt") == []
+    store.add(vins[2], "Ford")
+    assert lines(tmp_path / "make_Ford.txt") == vins
+    assert lines(tmp_path / "make_name.txt") == ["Ford"]
+    store.close()
+
+
+def test_known_makes_are_not_listed_twice(tmp_path):
+    with VinStore(str(tmp_path)) as store:
+        store.add(make_vins("Tesla", 1)[0], "Tesla")
+    with VinStore(str(tmp_path)) as store:
+        assert store.known_makes == {"Tesla"}
+        store.add(make_vins("Tesla", 2)[1], "Tesla")
+        store.add(make_vins("Audi", 1)[0], "Audi")
+    assert lines(tmp_path / "make_name.txt") == ["Tesla", "Audi"]
+    assert len(lines(tmp_path / "make_Tesla.txt")) == 2
+
+
+def test_concurrent_adds_keep_whole_lines(tmp_path):
+    store = VinStore(str(tmp_path), flush_size=7, flush_interval=3600)
+    batches = [make_vins("Ford", 200, seed=seed) for seed in range(4)]
+    threads = [threading.Thread(target=lambda batch=batch: [store.add(vin, "Ford") for vin in batch])
+               for batch in batches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.close()
+
+    saved = lines(tmp_path / "make_Ford.txt")
+    assert sorted(saved) == sorted(vin for batch in batches for vin in batch)
+    assert (tmp_path / "make_Ford.txt").stat().st_size == len(saved) * 18
+
+
+def test_add_after_close_fails(tmp_path):
+    store = VinStore(str(tmp_path))
+    store.close()
+    store.close()
+    with pytest.raises(ValueError):
+        store.add(make_vins("Ford", 1)[0], "Ford")
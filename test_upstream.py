@@ -0,0 +1,92 @@
+# test_upstream.py
+# Circuit breaker and backoff behaviour of UpstreamClient, without a network:
+# _get is replaced by a coroutine that hangs, fails or answers.
+import asyncio
+import time
+
+import aiohttp
+import pytest
+
+from upstream import CircuitBreaker, CircuitOpenError, UpstreamClient
+
+
+class MaxRng:
+    # Makes jittered delays deterministic: always the top of the range
+    def uniform(self, low, high):
+        return high
+
+
+def half_open_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.opened_at = time.monotonic() - 31
+    return breaker
+
+
+def test_cancelled_half_open_probe_releases_the_breaker():
+    async def scenario():
+        client = UpstreamClient(breaker=half_open_breaker(), retries=0)
+
+        async def hang(url):
+            await asyncio.sleep(3600)
+        client._get = hang
+
+        probe = asyncio.ensure_future(client.fetch(hedge=False))
+        await asyncio.sleep(0)
+        assert client.breaker.probing
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        assert not client.breaker.probing
+        assert client.breaker.state == "half-open"
+
+        async def answer(url):
+            return "1FTFW1ET5DFC10312"
+        client._get = answer
+        assert await client.fetch(hedge=False) == "1FTFW1ET5DFC10312"
+        assert client.breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_failed_probe_reopens_the_breaker():
+    async def scenario():
+        client = UpstreamClient(breaker=half_open_breaker(), retries=0)
+
+        async def fail(url):
+            raise aiohttp.ClientConnectionError("down")
+        client._get = fail
+
+        with pytest.raises(aiohttp.ClientConnectionError):
+            await client.fetch(hedge=False)
+        assert client.breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            await client.fetch(hedge=False)
+
+    asyncio.run(scenario())
+
+
+def test_cooldown_grows_with_consecutive_give_ups_and_resets():
+    async def scenario():
+        breaker = CircuitBreaker(failure_threshold=100)
+        client = UpstreamClient(breaker=breaker, retries=0, backoff_base=0.5, backoff_cap=30, rng=MaxRng())
+        outcome = {"fail": True}
+
+        async def get(url):
+            if outcome["fail"]:
+                raise aiohttp.ClientConnectionError("down")
+            return "1FTFW1ET5DFC10312"
+        client._get = get
+
+        delays = []
+        for _ in range(4):
+            with pytest.raises(aiohttp.ClientConnectionError):
+                await client.fetch(hedge=False)
+            delays.append(client.cooldown())
+        assert delays == [1.0, 2.0, 4.0, 8.0]
+
+        outcome["fail"] = False
+        await client.fetch(hedge=False)
+        assert client.cooldown() == 0.5
+
+    asyncio.run(scenario())
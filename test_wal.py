@@ -0,0 +1,74 @@
+# test_wal.py
+# Crash recovery of the write-ahead log: make files are cut back to the
+# last checkpoint, every intact record is replayed exactly once, and a torn
+# or corrupt tail is discarded.
+import json
+import shutil
+
+from conftest import make_vins
+from vin_wal import _CHECKPOINT, _VIN, WAL_NAME, WalStore, encode_record, read_records
+
+
+def lines(path):
+    return path.read_text().split() if path.exists() else []
+
+
+def write_crashed_log(data_dir, sizes, logged, tail=b""):
+    with open(data_dir / WAL_NAME, "wb") as f:
+        f.write(encode_record(_CHECKPOINT, json.dumps({"files": sizes}).encode()))
+        for vin, make in logged:
+            f.write(encode_record(_VIN, f"{vin}\t{make}".encode()))
+        f.write(tail)
+
+
+def test_torn_tail_is_discarded_and_files_cut_back(tmp_path):
+    vins = make_vins("Ford", 5)
+    # Checkpointed: two VINs. Then three were logged and applied, and the
+    # crash tore the next record and left half a line in make_Ford.txt
+    (tmp_path / "make_name.txt").write_text("Ford\n")
+    (tmp_path / "make_Ford.txt").write_text("".join(vin + "\n" for vin in vins[:5]) + "1FTFW")
+    torn = encode_record(_VIN, f"{make_vins('Ford', 6)[5]}\tFord".encode())[:-4]
+    write_crashed_log(tmp_path, {"make_Ford.txt": 36, "make_name.txt": 5},
+                      [(vin, "Ford") for vin in vins[2:]], tail=torn)
+
+    store = WalStore(str(tmp_path))
+    assert store.replayed == 3 and store.torn_bytes == len(torn)
+    store.close()
+    assert lines(tmp_path / "make_Ford.txt") == vins
+    assert (tmp_path / "make_Ford.txt").stat().st_size == 5 * 18
+    assert not (tmp_path / WAL_NAME).exists()
+
+
+def test_corrupt_record_ends_the_replay(tmp_path):
+    vins = make_vins("Tesla", 3)
+    write_crashed_log(tmp_path, {}, [(vin, "Tesla") for vin in vins])
+    data = bytearray((tmp_path / WAL_NAME).read_bytes())
+    data[-3] ^= 0xFF  # flip a byte in the last VIN
+    (tmp_path / WAL_NAME).write_bytes(bytes(data))
+
+    records, end, size = read_records(tmp_path / WAL_NAME)
+    assert [kind for kind, _ in records] == [_CHECKPOINT, _VIN, _VIN] and size - end > 0
+    with WalStore(str(tmp_path)) as store:
+        assert store.replayed == 2
+    assert lines(tmp_path / "make_Tesla.txt") == vins[:2]
+    assert lines(tmp_path / "make_name.txt") == ["Tesla"]
+
+
+def test_snapshot_of_a_running_store_recovers_without_duplicates(tmp_path):
+    live, crashed = tmp_path / "live", tmp_path / "crashed"
+    vins = make_vins("Audi", 30)
+    store = WalStore(str(live), commit_interval=0)
+    for vin in vins[:10]:
+        store.add(vin, "Audi")
+    store.commit()
+    store.checkpoint()
+    for vin in vins[10:]:
+        store.add(vin, "Audi")
+    store.commit()
+    # What a power cut would leave: log and make files as they are now
+    shutil.copytree(live, crashed)
+    store.close()
+
+    with WalStore(str(crashed)) as recovered:
+        assert recovered.replayed == 20
+    assert lines(crashed / "make_Audi.txt") == lines(live / "make_Audi.txt") == vins
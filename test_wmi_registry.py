@@ -0,0 +1,35 @@
+# test_wmi_registry.py
+# WMI classification: exact three-character codes win over two-character
+# manufacturer prefixes, and classify_many agrees with classify.
+import numpy as np
+import pytest
+
+from wmi_registry import WMI_REGISTRY, _build_index, classify, classify_many
+
+
+def test_every_registered_wmi_classifies_to_its_make():
+    for make, wmis in WMI_REGISTRY.items():
+        for wmi in wmis:
+            assert classify(wmi + "ABCDEF12345678") == make
+
+
+def test_exact_wmi_beats_a_prefix_and_prefixes_fill_gaps():
+    assert classify("JTHBK1GG0D2000000") == "Lexus"    # JT is Toyota's prefix
+    assert classify("JTZZZ000000000000") == "Toyota"   # unlisted JT WMI
+    assert classify("ZZZ00000000000000") is None
+    assert classify("") is None
+
+
+def test_classify_many_matches_classify():
+    vins = ["1FTFW1ET5DFC10312", "JTHBK1GG0D2000000", "JTZZZ000000000000", "ZZZ00000000000000", "WF"]
+    expected = [classify(vin) for vin in vins]
+    assert classify_many(np.array(vins)).tolist() == expected
+    assert classify_many(np.array(vins, dtype="S17")).tolist() == expected
+    assert classify_many(np.array([], dtype="S17")).tolist() == []
+
+
+def test_a_wmi_registered_to_two_makes_is_rejected():
+    with pytest.raises(ValueError, match="both"):
+        _build_index({"A": ["1AB"], "B": ["1AB"]}, 3)
+    with pytest.raises(ValueError, match="3-character"):
+        _build_index({"A": ["1A"]}, 3)
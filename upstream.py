@@ -0,0 +1,198 @@
+# upstream.py
+# Upstream VIN source and the shared client every caller uses to reach it.
+# Point VIN_UPSTREAM_URL at a stand-in such as fake_upstream.py to run
+# everything offline.
+#
+# UpstreamClient keeps one pooled keep-alive session with DNS caching and
+# wraps each request in a timeout, jittered exponential backoff between
+# retries, a circuit breaker that fails fast while the upstream is down, and
+# an optional hedge: a second request sent once the first has been slower
+# than most recent ones.
+import asyncio
+import os
+import random
+import time
+from collections import deque
+
+import aiohttp
+
+UPSTREAM_URL = os.environ.get("VIN_UPSTREAM_URL", "https://randomvin.com/getvin.php")
+REAL_VIN_API = f"{UPSTREAM_URL}?type=real"
+FAKE_VIN_API = f"{UPSTREAM_URL}?type=fake"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+# Everything a caller should treat as "the upstream did not answer"
+UPSTREAM_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError)
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0, rng=random):
+    # Full jitter: uniform in [0, min(cap, base * 2^attempt)]
+    return rng.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    # Opens after `failure_threshold` consecutive failures and rejects calls
+    # for `reset_timeout` seconds; then lets one probe through (half-open)
+    # and closes again on its success
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def retry_in(self):
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+    def abandon_probe(self):
+        # The probe was cancelled without an answer; let the next call probe
+        self.probing = False
+
+
+class UpstreamClient:
+    def __init__(self, url=REAL_VIN_API, timeout=10.0, connect_timeout=3.0, retries=3,
+                 backoff_base=0.5, backoff_cap=30.0, hedge_quantile=0.95, limit=20,
+                 breaker=None, rng=random):
+        self.url = url
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hedge_quantile = hedge_quantile
+        self.limit = limit
+        self.breaker = breaker or CircuitBreaker()
+        self.rng = rng
+        self.latencies = deque(maxlen=200)
+        self.hedges = 0
+        self.give_ups = 0  # consecutive fetch() calls that raised
+        self._session = None
+
+    @property
+    def session(self):
+        # Created lazily so it binds to the loop the client is first used on
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, ttl_dns_cache=300, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def hedge_delay(self):
+        # Recent latency quantile; no hedging until there is enough history
+        if self.hedge_quantile is None or len(self.latencies) < 20:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.hedge_quantile))]
+
+    def cooldown(self):
+        # How long a caller should wait after fetch() gave up; grows with
+        # each consecutive give-up until a fetch succeeds
+        return self.breaker.retry_in() or backoff_delay(self.give_ups, self.backoff_base, self.backoff_cap,
+                                                        self.rng)
+
+    async def _get(self, url):
+        start = time.monotonic()
+        async with self.session.get(url) as response:
+            response.raise_for_status()
+            body = await response.text()
+        self.latencies.append(time.monotonic() - start)
+        return body.strip()
+
+    async def _hedged_get(self, url):
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._get(url)
+        tasks = {asyncio.ensure_future(self._get(url))}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.hedges += 1
+                tasks.add(asyncio.ensure_future(self._get(url)))
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def fetch(self, url=None, hedge=True):
+        # One response body, stripped. Raises CircuitOpenError while the
+        # breaker is open, or the last error once retries are exhausted
+        url = url or self.url
+        for attempt in range(self.retries + 1):
+            probe = self.breaker.state == "half-open"
+            if not self.breaker.allow():
+                self.give_ups += 1
+                raise CircuitOpenError(f"upstream circuit open, retry in {self.breaker.retry_in():.0f}s")
+            try:
+                body = await (self._hedged_get(url) if hedge else self._get(url))
+            except asyncio.CancelledError:
+                # Routine for losing fan-out and hedged requests; a cancelled
+                # probe must not leave the breaker waiting on it forever
+                if probe:
+                    self.breaker.abandon_probe()
+                raise
+            except Exception as e:
+                self.breaker.record_failure()
+                status = getattr(e, "status", None)
+                # Other 4xx answers and unexpected errors will not change on a retry
+                if (attempt == self.retries or not isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError))
+                        or (status and status < 500 and status != 429)):
+                    self.give_ups += 1
+                    raise
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap, self.rng)
+                retry_after = getattr(e, "headers", None) and e.headers.get("Retry-After")
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                await asyncio.sleep(delay)
+            else:
+                self.breaker.record_success()
+                self.give_ups = 0
+                return body
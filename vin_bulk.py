@@ -0,0 +1,231 @@
+# vin_bulk.py
+# Bulk VIN generation: vectorized NumPy batches streamed in chunks to
+# stdout, CSV, NDJSON or Parquet with constant memory for any row count.
+# Chunks can be spread over worker processes; every chunk draws from its
+# own seed derived from (master seed, shard, chunk index), so output does
+# not depend on how many processes produced it. Model years run up to a
+# fixed --last-year rather than the current year, so a seed gives the same
+# output whenever it is rerun.
+import argparse
+import math
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+
+import numpy as np
+
+from vin_generator import MODEL_YEAR_BASE, MODEL_YEAR_CODES, VIN_ALPHABET
+from vin_validator import check_digit_matrix
+from wmi_registry import WMI_REGISTRY
+
+FORMATS = ("txt", "csv", "ndjson", "parquet")
+CHUNK_SIZE = 1_000_000
+LAST_YEAR = 2025  # default newest model year; part of what a seed reproduces
+
+_ALPHABET = np.frombuffer(VIN_ALPHABET.encode(), dtype=np.uint8)
+_LETTERS = 23  # VIN_ALPHABET is 23 letters followed by 10 digits
+_YEAR_CODES = np.frombuffer(MODEL_YEAR_CODES.encode(), dtype=np.uint8)
+
+
+class MakeTable:
+    # Flattened WMI table for the selected makes; each make is equally
+    # likely, then each of its WMIs
+    def __init__(self, makes):
+        self.makes = np.array(makes, dtype=object)
+        wmis = [wmi for make in makes for wmi in WMI_REGISTRY[make]]
+        self.wmis = np.frombuffer("".join(wmis).encode(), dtype=np.uint8).reshape(-1, 3)
+        self.counts = np.array([len(WMI_REGISTRY[make]) for make in makes])
+        self.starts = np.concatenate(([0], np.cumsum(self.counts)[:-1]))
+
+
+@lru_cache(maxsize=8)
+def make_table(makes):
+    return MakeTable(list(makes))
+
+
+def generate_batch(table, size, rng, first_year=MODEL_YEAR_BASE, last_year=LAST_YEAR):
+    make_idx = rng.integers(len(table.makes), size=size)
+    wmi_idx = table.starts[make_idx] + (rng.random(size) * table.counts[make_idx]).astype(np.int64)
+    years = rng.integers(first_year, last_year + 1, size=size)
+
+    matrix = np.empty((size, 17), dtype=np.uint8)
+    matrix[:, :3] = table.wmis[wmi_idx]
+    matrix[:, 3:8] = _ALPHABET[rng.integers(len(_ALPHABET), size=(size, 5))]
+    # Position 7: a letter from 2010 on, a digit before, matching vin_generator
+    matrix[:, 6] = np.where(years >= 2010,
+                            _ALPHABET[rng.integers(_LETTERS, size=size)],
+                            _ALPHABET[_LETTERS + rng.integers(10, size=size)])
+    matrix[:, 9] = _YEAR_CODES[(years - MODEL_YEAR_BASE) % 30]
+    matrix[:, 10] = _ALPHABET[rng.integers(len(_ALPHABET), size=size)]
+    matrix[:, 11:] = ord("0") + rng.integers(10, size=(size, 6), dtype=np.uint8)
+    matrix[:, 8] = ord("0")
+    matrix[:, 8] = check_digit_matrix(matrix)[0]
+    return matrix, table.makes[make_idx], years
+
+
+def encode_chunk(matrix, makes, years, fmt):
+    if fmt == "txt":
+        lines = np.empty((len(matrix), 18), dtype=np.uint8)
+        lines[:, :17] = matrix
+        lines[:, 17] = ord("\n")
+        return lines.tobytes()
+    vins = matrix.view("S17").ravel().astype(str)
+    years = years.astype(str)
+    if fmt == "csv":
+        rows = np.char.add(np.char.add(np.char.add(vins, ","), makes.astype(str)), ",")
+        rows = np.char.add(np.char.add(rows, years), "\n")
+    else:
+        rows = np.char.add(np.char.add('{"vin":"', vins), '","make":"')
+        rows = np.char.add(np.char.add(rows, makes.astype(str)), '","model_year":')
+        rows = np.char.add(np.char.add(rows, years), "}\n")
+    return "".join(rows.tolist()).encode()
+
+
+class ParquetSink:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+        self.pa = pa
+        self.schema = pa.schema([("vin", pa.string()), ("make", pa.dictionary(pa.int8(), pa.string())),
+                                 ("model_year", pa.int16())])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write_chunk(self, chunk):
+        self.write(*chunk)
+
+    def write(self, matrix, makes, years):
+        pa = self.pa
+        columns = [pa.array(matrix.view("S17").ravel().astype(str)),
+                   pa.array(makes.astype(str)).dictionary_encode().cast(self.schema.field("make").type),
+                   pa.array(years.astype(np.int16))]
+        self.writer.write_table(pa.Table.from_arrays(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class StreamSink:
+    def __init__(self, path, fmt):
+        self.fmt = fmt
+        self.out = sys.stdout.buffer if path == "-" else open(path, "wb")
+        if fmt == "csv":
+            self.out.write(b"vin,make,model_year\n")
+
+    def write_chunk(self, chunk):
+        self.out.write(chunk)
+
+    def write(self, matrix, makes, years):
+        self.out.write(encode_chunk(matrix, makes, years, self.fmt))
+
+    def close(self):
+        self.out.flush()
+        if self.out is not sys.stdout.buffer:
+            self.out.close()
+
+
+def open_sink(path, fmt):
+    if fmt == "parquet":
+        if path == "-":
+            raise SystemExit("Parquet output needs a file path (-o)")
+        return ParquetSink(path)
+    return StreamSink(path, fmt)
+
+
+def plan_chunks(makes, count, fmt, seed=None, shards=1, chunk_size=CHUNK_SIZE, last_year=LAST_YEAR):
+    # Shard i gets rows [i * count / shards, ...) and a SeedSequence child of
+    # the master seed; each of its chunks gets a child of that
+    makes = tuple(makes)
+    for shard, shard_seed in enumerate(np.random.SeedSequence(seed).spawn(shards)):
+        size = count // shards + (shard < count % shards)
+        chunk_seeds = shard_seed.spawn(math.ceil(size / chunk_size))
+        for index, chunk_seed in enumerate(chunk_seeds):
+            yield makes, min(chunk_size, size - index * chunk_size), fmt, chunk_seed, last_year
+
+
+def generate_chunk(task):
+    makes, size, fmt, chunk_seed, last_year = task
+    matrix, make_col, years = generate_batch(make_table(makes), size, np.random.default_rng(chunk_seed),
+                                             last_year=last_year)
+    if fmt == "parquet":
+        return matrix, make_col, years
+    return encode_chunk(matrix, make_col, years, fmt)
+
+
+def generate_to(sink, makes, count, fmt, seed=None, shards=1, processes=1,
+                ordered=True, chunk_size=CHUNK_SIZE, last_year=LAST_YEAR):
+    tasks = plan_chunks(makes, count, fmt, seed, shards, chunk_size, last_year)
+    if processes <= 1:
+        for task in tasks:
+            sink.write_chunk(generate_chunk(task))
+        return
+
+    # Keep a bounded window of chunks in flight so memory stays flat
+    window = processes * 2
+    with ProcessPoolExecutor(processes) as pool:
+        if ordered:
+            in_flight = deque()
+            for task in tasks:
+                in_flight.append(pool.submit(generate_chunk, task))
+                if len(in_flight) >= window:
+                    sink.write_chunk(in_flight.popleft().result())
+            while in_flight:
+                sink.write_chunk(in_flight.popleft().result())
+        else:
+            in_flight = set()
+            for task in tasks:
+                in_flight.add(pool.submit(generate_chunk, task))
+                if len(in_flight) >= window:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        sink.write_chunk(future.result())
+            for future in in_flight:
+                sink.write_chunk(future.result())
+
+
+def parse_makes(value):
+    makes = list(WMI_REGISTRY) if not value else [make.strip() for make in value.split(",")]
+    unknown = [make for make in makes if make not in WMI_REGISTRY]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown makes: {', '.join(unknown)}")
+    return makes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate VINs in bulk")
+    parser.add_argument("-n", "--count", type=int, required=True)
+    parser.add_argument("--makes", type=parse_makes, default=list(WMI_REGISTRY),
+                        help="comma-separated makes (default: all)")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="txt")
+    parser.add_argument("-o", "--output", default="-", help="output path, '-' for stdout")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="master seed; same seed, last year, shards and chunk size give identical output")
+    parser.add_argument("--last-year", type=int, default=LAST_YEAR,
+                        help=f"newest model year generated (default: {LAST_YEAR})")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("-p", "--processes", type=int, default=1, help="worker processes")
+    parser.add_argument("--shards", type=int, default=None, help="seed shards (default: --processes)")
+    parser.add_argument("--unordered", action="store_true",
+                        help="write chunks as they finish instead of in shard order")
+    args = parser.parse_args()
+    if args.last_year < MODEL_YEAR_BASE:
+        parser.error(f"--last-year must be {MODEL_YEAR_BASE} or later")
+
+    if args.seed is None:
+        args.seed = np.random.SeedSequence().entropy
+    # Everything needed to reproduce this run's output
+    print(f"🎲 seed: {args.seed}, last year: {args.last_year}", file=sys.stderr)
+    start = time.perf_counter()
+    sink = open_sink(args.output, args.format)
+    try:
+        generate_to(sink, args.makes, args.count, args.format, args.seed,
+                    args.shards or args.processes, args.processes, not args.unordered, args.chunk_size,
+                    args.last_year)
+    finally:
+        sink.close()
+    elapsed = time.perf_counter() - start
+    print(f"✅ {args.count} rows in {elapsed:.2f}s ({args.count / elapsed:,.0f} rows/s)", file=sys.stderr)
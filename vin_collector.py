@@ -221,80 +221,377 @@
 # # # if __name__ == "__main__":
 #     asyncio.run(fetch_vins_forever())
 # vin_collector.py
-import aiohttp
+import argparse
 import asyncio
+import atexit
 import os
+import threading
+import time
+from collections import Counter
 from datetime import datetime
-import subprocess
-
-REAL_VIN_API = "https://randomvin.com/getvin.php?type=real"
-
-# WMI Codes → Make mapping
-WMI_CODES = {
-    "Toyota": "JTD", "Ford": "1FT", "Honda": "1HG", "BMW": "WBA", "Mercedes": "WDB",
-    "Chevrolet": "1GC", "Tesla": "5YJ", "Audi": "WAU", "Nissan": "1N4", "Hyundai": "KMH",
-    "Kia": "KNA", "Jeep": "1J4", "Dodge": "1B3", "Volkswagen": "3VW", "Subaru": "JF1",
-    "Mazda": "JM1", "Lexus": "JTH", "Volvo": "YV1", "Porsche": "WP0", "Jaguar": "SAJ",
-    "Land Rover": "SAL", "Mitsubishi": "JA3", "Infiniti": "JNK", "Acura": "19U", "Ferrari": "ZFF",
-    "Lamborghini": "ZHW", "Bugatti": "VF9", "Rolls-Royce": "SCA", "Bentley": "SCB"
-}
-
-vin_counter = 0
-
-# Auto commit changes to GitHub
-def auto_git_commit():
-    try:
-        subprocess.run("git add vin_data/*.txt", shell=True, check=True)
-        subprocess.run("git commit -m 'Auto: update VIN files'", shell=True, check=True)
-        subprocess.run("git push", shell=True, check=True)
-        print(f"[{datetime.now()}] ✨ Auto-committed VIN files to GitHub")
-    except subprocess.CalledProcessError as e:
-        print(f"[{datetime.now()}] ⚠️ Git commit failed: {e}")
+from git_publisher import GitPublisher
+from upstream import REAL_VIN_API, UpstreamClient
+from vin_db import BACKEND, VinDatabase
+from vin_dedupe import VinDeduper
+from vin_index import INDEX_NAME, VinIndex
+from vin_metrics import counter, gauge, histogram, start_metrics_server
+from vin_quota import QuotaTracker, format_eta, parse_quota, stored_counts
+from vin_stats import VinStats
+from vin_store import VinStore
+from vin_wal import WalStore
+from vin_validator import is_valid_vin
+from wmi_registry import WMI_REGISTRY, classify
+
+DATA_DIR = "vin_data"
+METRICS_PORT = 9108
+STORAGE_BACKEND = BACKEND
+WAL_ENABLED = True
+store = None
+deduper = None
+stats = None
+# Held while a VIN goes into the Bloom filter and the store, and while both
+# are flushed and saved, so a saved filter never marks a VIN the store has
+# not yet written; the publisher thread flushes concurrently with save_vin
+storage_lock = threading.Lock()
+
+# Quota mode: per-make targets; matches for full makes go to a capped
+# overflow under vin_data/overflow/ or are dropped
+quota = None
+overflow_store = None
+vin_index = None
+
+# Git publishing runs on a background thread; configured from the CLI
+PUBLISH_INTERVAL = 60
+PUBLISH_MAX_PENDING = 10_000
+PUBLISH_ENABLED = True
+publisher = None
+
+# Prometheus metrics, served on METRICS_PORT at /metrics. The unknown-WMI
+# rate is vin_collector_vins_total{result="unknown_wmi"} over the total
+FETCH_SECONDS = histogram("vin_collector_fetch_seconds", "Upstream request latency, including the body")
+SAVE_SECONDS = histogram("vin_collector_save_seconds", "save_vin duration (dedupe + storage)")
+VINS = counter("vin_collector_vins_total", "Upstream responses by outcome", ["result"])
+ACCEPTED = counter("vin_collector_accepted_total", "VINs saved per make", ["make"])
+ERRORS = counter("vin_collector_errors_total", "Fetch exceptions by type", ["type"])
+gauge("vin_git_backlog", "VINs saved but not yet published to git",
+      function=lambda: publisher.stats()["backlog"] if publisher else 0)
+
+def get_publisher():
+    global publisher
+    if publisher is None:
+        publisher = GitPublisher(PUBLISH_INTERVAL, PUBLISH_MAX_PENDING,
+                                 before_publish=flush_storage)
+    return publisher
 
 def get_make(vin):
-    for make, wmi in WMI_CODES.items():
-        if vin.startswith(wmi):
-            return make
-    return None
+    return classify(vin)
+
+def get_store():
+    global store
+    if store is None:
+        if STORAGE_BACKEND == "sqlite":
+            store = VinDatabase(os.path.join(DATA_DIR, "vins.db"))
+        elif WAL_ENABLED:
+            store = WalStore(DATA_DIR)
+        else:
+            store = VinStore(DATA_DIR)
+    return store
+
+def get_deduper():
+    global deduper
+    if deduper is None:
+        # Open the store first so a WAL replay is in the corpus the filter sees
+        get_store()
+        deduper = VinDeduper(DATA_DIR, db=store if STORAGE_BACKEND == "sqlite" else None)
+    return deduper
+
+def get_stats():
+    global stats
+    if stats is None:
+        # Opened after the store (and any WAL replay) so it can be checked
+        # against the corpus: a crash may have cost it its last save
+        get_store()
+        db = store if STORAGE_BACKEND == "sqlite" else None
+        stats = VinStats(DATA_DIR)
+        fixed = stats.reconcile(stored_counts(DATA_DIR, db))
+        if fixed:
+            print(f"[{datetime.now()}] 🩹 vin_stats.json counts corrected for {', '.join(fixed)}")
+    return stats
+
+def get_overflow_store():
+    global overflow_store
+    if overflow_store is None:
+        overflow_store = VinStore(os.path.join(DATA_DIR, "overflow"))
+    return overflow_store
+
+def start_quota(targets, overflow_cap=0):
+    global quota
+    # Open the store first so a WAL replay is counted towards the targets
+    get_store()
+    db = store if STORAGE_BACKEND == "sqlite" else None
+    quota = QuotaTracker(targets, stored_counts(DATA_DIR, db), overflow_cap,
+                         stored_counts(os.path.join(DATA_DIR, "overflow")))
+    return quota
+
+# The secondary index is only maintained once it has been built with
+# `python vin_index.py build`; each update indexes just the appended VINs
+def update_index():
+    global vin_index
+    if store is None or STORAGE_BACKEND == "sqlite" or not os.path.exists(os.path.join(DATA_DIR, INDEX_NAME)):
+        return
+    if vin_index is None:
+        vin_index = VinIndex.open(DATA_DIR)
+        vin_index.save()
+    elif vin_index.refresh():
+        vin_index.save()
+
+def flush_storage():
+    with storage_lock:
+        if store:
+            store.flush()
+        if deduper:
+            deduper.save()
+    if overflow_store:
+        overflow_store.flush()
+    if stats:
+        stats.save()
+    update_index()
+
+def close_storage():
+    with storage_lock:
+        if store:
+            store.close()
+        if deduper:
+            deduper.save()
+    if overflow_store:
+        overflow_store.close()
+    if stats:
+        stats.save()
+    update_index()
+
+atexit.register(close_storage)
+
+# Drops every storage object (after close_storage) so the next call opens
+# fresh ones, e.g. once DATA_DIR points somewhere else
+STORAGE_GLOBALS = ("store", "deduper", "stats", "vin_index", "quota", "overflow_store")
+
+def reset_storage():
+    for name in STORAGE_GLOBALS:
+        globals()[name] = None
 
 def save_vin(vin, make):
-    global vin_counter
-    os.makedirs("vin_data", exist_ok=True)
-    make_file = os.path.join("vin_data", f"make_{make}.txt")
-    name_file = os.path.join("vin_data", "make_name.txt")
-
-    with open(make_file, "a") as f:
-        f.write(vin + "\n")
-
-    if os.path.exists(name_file):
-        with open(name_file, "r") as f:
-            makes = set(line.strip() for line in f)
+    with SAVE_SECONDS.time():
+        with storage_lock:
+            saved = get_deduper().add(vin)
+            if saved:
+                get_store().add(vin, make)
+        if not saved:
+            get_stats().record_duplicate(make)
+            return False
+        get_stats().record_saved(make)
+    if PUBLISH_ENABLED:
+        get_publisher().notify()
+    return True
+
+def save_overflow(vin, make):
+    if quota.take_overflow(make):
+        get_overflow_store().add(vin, make)
+        VINS.inc(result="overflow")
+        print(f"[{datetime.now()}] 📥 Overflow: {vin} → {make}")
+    else:
+        VINS.inc(result="dropped")
+        print(f"[{datetime.now()}] 🗑️ Quota full: {vin} → {make}")
+
+def handle_vin(vin):
+    make = get_make(vin)
+    if not is_valid_vin(vin):
+        VINS.inc(result="invalid")
+        print(f"[{datetime.now()}] ❌ Invalid VIN: {vin[:40]!r}")
+        return None
+    # Garbage responses say nothing about how often each make turns up
+    if quota is not None:
+        quota.observe()
+    if make:
+        if quota is not None and not quota.wants(make):
+            save_overflow(vin, make)
+            return None
+        if not save_vin(vin, make):
+            VINS.inc(result="duplicate")
+            print(f"[{datetime.now()}] ♻️ Duplicate: {vin} → {make}")
+            return None
+        VINS.inc(result="saved")
+        ACCEPTED.inc(make=make)
+        if quota is not None:
+            quota.record(make)
+        print(f"[{datetime.now()}] ✅ {vin} → {make}")
     else:
-        makes = set()
-
-    if make not in makes:
-        with open(name_file, "a") as f:
-            f.write(make + "\n")
-
-    vin_counter += 1
-    if vin_counter % 5 == 0:
-        auto_git_commit()
-
-async def fetch_vins_forever():
-    async with aiohttp.ClientSession() as session:
-        while True:
-            try:
-                async with session.get(REAL_VIN_API) as response:
-                    vin = (await response.text()).strip()
-                    make = get_make(vin)
-                    if make:
-                        save_vin(vin, make)
-                        print(f"[{datetime.now()}] ✅ {vin} → {make}")
-                    else:
-                        print(f"[{datetime.now()}] ❌ Unknown WMI: {vin}")
-            except Exception as e:
-                print(f"[{datetime.now()}] ❌ Error: {e}")
-            await asyncio.sleep(1)
+        VINS.inc(result="unknown_wmi")
+        get_stats().record_unknown_wmi()
+        print(f"[{datetime.now()}] ❌ Unknown WMI: {vin}")
+    return make
+
+# Timeouts, retries with backoff, the circuit breaker and hedging all live
+# in UpstreamClient; errors reaching here mean it has already given up
+async def fetch_vin(client):
+    with FETCH_SECONDS.time():
+        return await client.fetch()
+
+async def fetch_vins_forever(report_interval=10):
+    reporter = asyncio.create_task(report_status(report_interval))
+    try:
+        async with UpstreamClient(REAL_VIN_API) as client:
+            while quota is None or not quota.done():
+                delay = 1
+                try:
+                    vin = await fetch_vin(client)
+                    handle_vin(vin)
+                except Exception as e:
+                    ERRORS.inc(type=type(e).__name__)
+                    print(f"[{datetime.now()}] ❌ Error: {e!r}")
+                    delay = max(delay, client.cooldown())
+                await asyncio.sleep(delay)
+    finally:
+        reporter.cancel()
+
+# Global request-rate limiter shared by all fetch workers
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+async def fetch_worker(client, limiter, stats):
+    while quota is None or not quota.done():
+        if limiter:
+            await limiter.acquire()
+        try:
+            vin = await fetch_vin(client)
+            stats["fetched"] += 1
+            if handle_vin(vin):
+                stats["saved"] += 1
+        except Exception as e:
+            stats["errors"] += 1
+            ERRORS.inc(type=type(e).__name__)
+            print(f"[{datetime.now()}] ❌ Error: {e!r}")
+            await asyncio.sleep(client.cooldown())
+
+async def report_throughput(stats, interval):
+    last, last_time = dict(stats), time.monotonic()
+    while True:
+        await asyncio.sleep(interval)
+        now = time.monotonic()
+        elapsed = now - last_time
+        rates = {key: (stats[key] - last.get(key, 0)) / elapsed for key in ("fetched", "saved", "errors")}
+        print(f"[{datetime.now()}] 📈 {rates['fetched']:.1f} fetched/s, {rates['saved']:.1f} saved/s, "
+              f"{rates['errors']:.1f} errors/s (total saved: {stats['saved']})")
+        report_publisher()
+        if quota is not None:
+            report_quota()
+        last, last_time = dict(stats), now
+
+# Serial mode has no throughput stats, but the git backlog and quota still
+# need watching
+async def report_status(interval):
+    while True:
+        await asyncio.sleep(interval)
+        report_publisher()
+        if quota is not None:
+            report_quota()
+
+def report_publisher():
+    if publisher:
+        git = publisher.stats()
+        latency = f"{git['last_latency']:.2f}s" if git["last_latency"] is not None else "n/a"
+        print(f"[{datetime.now()}] 📦 git backlog: {git['backlog']} VINs ({git['backlog_age']:.0f}s old), "
+              f"{git['publishes']} published, {git['failures']} failed, last publish: {latency}")
+
+def report_quota():
+    remaining = quota.remaining()
+    slowest = ", ".join(f"{make} ({remaining[make]} left)" for make in quota.bottlenecks())
+    print(f"[{datetime.now()}] 🎯 quota {quota.progress():.1%} met, {len(remaining)} makes left, "
+          f"ETA {format_eta(quota.eta())}" + (f", slowest: {slowest}" if slowest else ""))
+
+async def fetch_vins_concurrently(workers=8, rate=None, report_interval=10):
+    stats = Counter()
+    limiter = TokenBucket(rate) if rate else None
+    # Twice the workers so hedged requests never queue behind the pool limit
+    async with UpstreamClient(REAL_VIN_API, limit=workers * 2) as client:
+        tasks = [asyncio.create_task(fetch_worker(client, limiter, stats)) for _ in range(workers)]
+        reporter = asyncio.create_task(report_throughput(stats, report_interval))
+        try:
+            # Workers only return once every quota is met
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks + [reporter]:
+                task.cancel()
+
+async def collect(workers=1, rate=None, report_interval=10, metrics_port=METRICS_PORT):
+    runner = await start_metrics_server(metrics_port) if metrics_port else None
+    try:
+        if workers > 1 or rate:
+            await fetch_vins_concurrently(workers, rate, report_interval)
+        else:
+            await fetch_vins_forever(report_interval)
+        if quota is not None:
+            print(f"[{datetime.now()}] 🏁 All quotas met after {quota.fetched} valid VINs "
+                  f"({quota.dropped} dropped, {sum(quota.overflow.values())} in overflow)")
+    finally:
+        if runner:
+            await runner.cleanup()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collect real VINs into vin_data/")
+    parser.add_argument("--workers", type=int, default=1, help="concurrent fetch workers")
+    parser.add_argument("--rate", type=float, default=None, help="global request limit in req/s")
+    parser.add_argument("--report-interval", type=float, default=10, help="seconds between throughput reports")
+    parser.add_argument("--publish-interval", type=float, default=PUBLISH_INTERVAL, help="max seconds between git commits")
+    parser.add_argument("--publish-batch", type=int, default=PUBLISH_MAX_PENDING, help="commit once this many VINs are pending")
+    parser.add_argument("--no-publish", action="store_true", help="never commit or push to git")
+    parser.add_argument("--backend", choices=["files", "sqlite"], default=STORAGE_BACKEND,
+                        help="store VINs in make_*.txt files or in vin_data/vins.db")
+    parser.add_argument("--no-wal", action="store_true",
+                        help="write make_*.txt files directly, without the crash-safe write-ahead log")
+    parser.add_argument("--quota", type=parse_quota, default=None,
+                        help="per-make targets, e.g. Ford=100,Bugatti=5; stop once all are met")
+    parser.add_argument("--quota-all", type=int, default=None,
+                        help="target for every make not listed in --quota")
+    parser.add_argument("--overflow", type=int, default=0,
+                        help="extra VINs kept per full make in vin_data/overflow/ (default: drop)")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                        help="serve Prometheus metrics on this port, 0 to disable")
+    args = parser.parse_args()
+
+    PUBLISH_INTERVAL = args.publish_interval
+    PUBLISH_MAX_PENDING = args.publish_batch
+    PUBLISH_ENABLED = not args.no_publish
+    STORAGE_BACKEND = args.backend
+    WAL_ENABLED = not args.no_wal
+    targets = dict.fromkeys(WMI_REGISTRY, args.quota_all) if args.quota_all else {}
+    targets.update(args.quota or {})
+    if targets:
+        start_quota(targets, args.overflow)
+        report_quota()
+    try:
+        asyncio.run(collect(args.workers, args.rate, args.report_interval, args.metrics_port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if publisher:
+            publisher.stop()
+        close_storage()
 
 # # # if __name__ == "__main__":
 # # #     asyncio.run(fetch_vins_forever())
@@ -0,0 +1,175 @@
+# vin_db.py
+# Optional SQLite storage backend: one WAL-mode database with batched
+# inserts and indexes on make, WMI and model year.
+import argparse
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from vin_dedupe import corpus_files
+from vin_generator import model_year
+
+DB_PATH = os.path.join("vin_data", "vins.db")
+RANDOM_ATTEMPTS = 16  # rowid draws random_vin tries before counting the make
+# "files" keeps the make_*.txt layout, "sqlite" writes to DB_PATH instead
+BACKEND = os.environ.get("VIN_BACKEND", "files")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vins (
+    vin TEXT PRIMARY KEY,
+    make TEXT NOT NULL,
+    wmi TEXT NOT NULL,
+    model_year INTEGER,
+    plant TEXT,
+    collected_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_vins_make ON vins (make);
+CREATE INDEX IF NOT EXISTS idx_vins_wmi ON vins (wmi);
+CREATE INDEX IF NOT EXISTS idx_vins_model_year ON vins (model_year);
+"""
+
+
+def vin_row(vin, make, collected_at=None):
+    return (vin, make, vin[:3], model_year(vin), vin[10], collected_at or time.time())
+
+
+class VinDatabase:
+    def __init__(self, path=DB_PATH, batch_size=1000, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    # Same add/flush/close interface as VinStore
+    def add(self, vin, make):
+        with self._lock:
+            self._pending.append(vin_row(vin, make))
+            due = (len(self._pending) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def add_many(self, rows):
+        with self._lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany("INSERT OR IGNORE INTO vins VALUES (?, ?, ?, ?, ?, ?)", rows)
+            return self.conn.total_changes - before
+
+    def flush(self):
+        with self._lock:
+            rows, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+        if rows:
+            self.add_many(rows)
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self.conn.close()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def makes(self):
+        return [make for (make,) in self._query("SELECT DISTINCT make FROM vins ORDER BY make")]
+
+    def count(self, make=None):
+        if make is None:
+            return self._query("SELECT COUNT(*) FROM vins")[0][0]
+        return self._query("SELECT COUNT(*) FROM vins WHERE make = ?", (make,))[0][0]
+
+    def iter_vins(self, chunk_size=100_000):
+        # Every VIN in rowid order, chunk_size at a time; each chunk is one
+        # rowid range seek, so the lock is never held for the whole table
+        last = 0
+        while True:
+            rows = self._query("SELECT rowid, vin FROM vins WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                               (last, chunk_size))
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield [vin for _, vin in rows]
+
+    def make_stats(self):
+        # -> [(make, count, first collected_at, last collected_at)]
+        return self._query("SELECT make, COUNT(*), MIN(collected_at), MAX(collected_at) "
+                           "FROM vins GROUP BY make ORDER BY make")
+
+    def random_vins(self, make, count, rng=random):
+        # count independent random_vin draws; empty when the make has no VINs
+        span = self._rowid_span(make)
+        if span is None:
+            return []
+        return [vin for vin in (self._draw(make, span, rng) for _ in range(count)) if vin]
+
+    def random_vin(self, make=None, rng=random):
+        # Every VIN of the make (or of the corpus) is equally likely
+        span = self._rowid_span(make)
+        return self._draw(make, span, rng) if span else None
+
+    def _rowid_span(self, make):
+        if make is None:
+            lo, hi = self._query("SELECT (SELECT MIN(rowid) FROM vins), (SELECT MAX(rowid) FROM vins)")[0]
+        else:
+            # Two scalar subqueries, so each bound is one index seek
+            lo, hi = self._query("SELECT (SELECT MIN(rowid) FROM vins WHERE make = ?), "
+                                 "(SELECT MAX(rowid) FROM vins WHERE make = ?)", (make, make))[0]
+        return None if lo is None else (lo, hi)
+
+    def _draw(self, make, span, rng):
+        # Rejection sampling over the rowid span: a random rowid is kept only
+        # if it is one of the make's rows, at one primary-key lookup per
+        # attempt. A make that is a small share of its span (a rare make
+        # interleaved with common ones) misses RANDOM_ATTEMPTS times in a
+        # row and is drawn by offset into its rows on the make index instead:
+        # still uniform, and cheap because such a make has few rows
+        for _ in range(RANDOM_ATTEMPTS):
+            rows = self._query("SELECT vin, make FROM vins WHERE rowid = ?", (rng.randint(*span),))
+            if rows and (make is None or rows[0][1] == make):
+                return rows[0][0]
+        total = self.count(make)
+        if not total:
+            return None
+        if make is None:
+            rows = self._query("SELECT vin FROM vins LIMIT 1 OFFSET ?", (rng.randrange(total),))
+        else:
+            rows = self._query("SELECT vin FROM vins WHERE make = ? LIMIT 1 OFFSET ?",
+                               (make, rng.randrange(total)))
+        return rows[0][0] if rows else None
+
+    def import_text_files(self, data_dir="vin_data"):
+        inserted = 0
+        for path in corpus_files(data_dir):
+            make = os.path.basename(path)[len("make_"):-len(".txt")]
+            collected_at = os.path.getmtime(path)
+            with open(path) as f:
+                rows = [vin_row(vin, make, collected_at) for vin in (line.strip() for line in f)
+                        if len(vin) == 17]
+            inserted += self.add_many(rows)
+        return inserted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the SQLite VIN corpus")
+    parser.add_argument("command", choices=["import", "count"])
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--data-dir", default="vin_data")
+    args = parser.parse_args()
+
+    db = VinDatabase(args.db)
+    if args.command == "import":
+        print(f"✅ Imported {db.import_text_files(args.data_dir)} new VINs into {args.db}")
+    for make in db.makes():
+        print(f"{make}: {db.count(make)}")
+    print(f"Total: {db.count()}")
+    db.close()
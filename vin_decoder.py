@@ -0,0 +1,152 @@
+# vin_decoder.py
+# VIN decoding from precomputed tables: WMI / VDS / VIS sections, make and
+# region, model year (position 10, with the 30-year cycle resolved by
+# position 7), plant (position 11) and the check digit. decode() handles
+# one VIN; decode_many() decodes NumPy arrays of VINs column by column.
+#   python vin_decoder.py 1FTFW1ET5DFC10312
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+from vin_generator import MODEL_YEAR_BASE, MODEL_YEAR_CODES, TRANSLITERATION, compute_check_digit, model_year
+from vin_validator import _as_matrix, check_digit_matrix
+from wmi_registry import classify, classify_many
+
+# Position 1 → region of manufacture (ISO 3780 ranges)
+REGIONS = ("Africa", "Asia", "Europe", "North America", "Oceania", "South America")
+_REGION_RANGES = {0: "ABCDEFGH", 1: "JKLMNPR", 2: "STUVWXYZ", 3: "12345", 4: "67", 5: "890"}
+
+# Position 11 is assigned by each manufacturer, and a make's WMIs from
+# other regions (Ford's WF0 and MAJ) use their own codes, so plants are
+# keyed by (make, region); region None covers every region. Only
+# well-documented codes are listed, anything else decodes to its raw code
+PLANTS = {
+    ("Tesla", None): {"A": "Austin, TX", "B": "Berlin, Germany", "C": "Shanghai, China",
+                      "F": "Fremont, CA"},
+    ("Ford", "North America"): {"B": "Oakville, ON", "E": "Louisville, KY (Kentucky Truck)",
+                                "F": "Dearborn, MI", "G": "Chicago, IL", "K": "Kansas City, MO",
+                                "U": "Louisville, KY"},
+}
+# model_year when position 10 is not a year code; an int, not None, so
+# decode() and the int16 column of decode_many() agree
+NO_YEAR = 0
+# check_digit for input that is not 17 legal characters; a str, not None,
+# for the same reason with decode_many()'s bytes column
+NO_CHECK_DIGIT = ""
+
+# Byte-indexed lookup tables; -1 marks "not applicable"
+_YEAR_INDEX = np.full(256, -1, dtype=np.int16)
+for _index, _code in enumerate(MODEL_YEAR_CODES):
+    _YEAR_INDEX[ord(_code)] = _index
+_REGION_INDEX = np.full(256, -1, dtype=np.int8)
+for _region, _chars in _REGION_RANGES.items():
+    for _char in _chars:
+        _REGION_INDEX[ord(_char)] = _region
+_IS_LETTER = np.zeros(256, dtype=bool)
+_IS_LETTER[np.frombuffer(b"ABCDEFGHJKLMNPRSTUVWXYZ", dtype=np.uint8)] = True
+_IS_SPACE = np.zeros(256, dtype=bool)
+_IS_SPACE[np.frombuffer(b" \t\n\r\x0b\x0c", dtype=np.uint8)] = True
+
+
+class DecodedVin(NamedTuple):
+    vin: str
+    valid: bool
+    check_digit: str
+    wmi: str
+    vds: str
+    vis: str
+    make: str
+    region: str
+    model_year: int
+    plant_code: str
+    plant: str
+    serial: str
+
+
+@lru_cache(maxsize=4096)
+def wmi_info(wmi):
+    # -> (make, region); cached since a corpus has only a few hundred WMIs
+    region = _REGION_INDEX[ord(wmi[0])] if wmi and wmi[0].isascii() else -1
+    return classify(wmi), REGIONS[region] if region >= 0 else None
+
+
+def plant_name(make, region, code):
+    plants = PLANTS.get((make, region)) or PLANTS.get((make, None), {})
+    return plants.get(code)
+
+
+def decode(vin):
+    # Structurally broken input still decodes what it can; check `valid`
+    vin = vin.strip().upper()
+    wellformed = len(vin) == 17 and all(c in TRANSLITERATION for c in vin)
+    expected = compute_check_digit(vin) if wellformed else NO_CHECK_DIGIT
+    make, region = wmi_info(vin[:3])
+    year = model_year(vin) if len(vin) >= 10 else None
+    plant_code = vin[10] if len(vin) >= 11 else None
+    return DecodedVin(vin, wellformed and vin[8] == expected, expected, vin[:3], vin[3:9], vin[9:17],
+                      make, region, NO_YEAR if year is None else year, plant_code,
+                      plant_name(make, region, plant_code), vin[11:17])
+
+
+def _column(matrix, start, stop):
+    return np.ascontiguousarray(matrix[:, start:stop]).view(f"S{stop - start}").ravel()
+
+
+def _normalised_matrix(vins):
+    # Stripped and upper-cased like decode(); the strip (slow, per string)
+    # only runs when some row has whitespace or the wrong length
+    matrix, lengths = _as_matrix(vins)
+    if ((lengths != 17) | _IS_SPACE[matrix[:, 0]] | _IS_SPACE[matrix[:, 16]]).any():
+        matrix, lengths = _as_matrix(np.char.strip(np.asarray(vins)))
+    lower = (matrix >= ord("a")) & (matrix <= ord("z"))
+    matrix[lower] -= ord("a") - ord("A")
+    return matrix, lengths
+
+
+def decode_many(vins):
+    # -> dict of equal-length columns, matching decode() field for field
+    # on 17-character input. model_year is NO_YEAR where position 10 is not
+    # a year code and check_digit NO_CHECK_DIGIT where a character is
+    # illegal; region, make and plant are None where unknown
+    matrix, lengths = _normalised_matrix(vins)
+    expected, legal = check_digit_matrix(matrix)
+    wellformed = legal & (lengths == 17)
+    wmi = _column(matrix, 0, 3)
+
+    year_index = _YEAR_INDEX[matrix[:, 9]]
+    years = np.where(year_index >= 0,
+                     MODEL_YEAR_BASE + year_index + 30 * _IS_LETTER[matrix[:, 6]], NO_YEAR).astype(np.int16)
+
+    region_names = np.array(REGIONS + (None,), dtype=object)
+    regions = region_names[_REGION_INDEX[matrix[:, 0]]]
+
+    makes = classify_many(wmi)
+    # Plant depends on (make, region, code); resolve each distinct WMI +
+    # code once
+    keys = np.ascontiguousarray(matrix[:, [0, 1, 2, 10]]).view("S4").ravel()
+    pairs, inverse = np.unique(keys, return_inverse=True)
+    plants = np.array([plant_name(*wmi_info(key[:3].decode(errors="replace")), key[3:].decode(errors="replace"))
+                       for key in pairs], dtype=object)
+    return {
+        "vin": _column(matrix, 0, 17),
+        "valid": wellformed & (matrix[:, 8] == expected),
+        "check_digit": np.where(wellformed, expected, 0).astype(np.uint8).view("S1"),
+        "wmi": wmi,
+        "vds": _column(matrix, 3, 9),
+        "vis": _column(matrix, 9, 17),
+        "make": makes,
+        "region": regions,
+        "model_year": years,
+        "plant_code": _column(matrix, 10, 11),
+        "plant": plants[inverse.reshape(-1)],
+        "serial": _column(matrix, 11, 17),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+    for arg in sys.argv[1:]:
+        for field, value in decode(arg)._asdict().items():
+            print(f"{field:>12}: {value}")
+        print()
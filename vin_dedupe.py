@@ -0,0 +1,174 @@
+# vin_dedupe.py
+# Persistent Bloom filter over every VIN in vin_data/, used to drop
+# duplicates before they are saved. Membership costs k bit probes no matter
+# how large the corpus is, and the filter is saved next to the make files.
+import glob
+import math
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"VINBLM01"
+HEADER = struct.Struct("<8sQQQQ")  # magic, bits, hashes, count, corpus size
+_MASK = (1 << 64) - 1
+
+
+def _mix(x):
+    # splitmix64 finalizer
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK
+    return x ^ (x >> 31)
+
+
+def _mix_array(x):
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _hashes(vin):
+    raw = vin.encode()
+    a = int.from_bytes(raw[:8], "little")
+    b = int.from_bytes(raw[8:16], "little")
+    h1 = _mix(a ^ _mix(b ^ raw[16]))
+    return h1, _mix(h1 ^ b) | 1
+
+
+def _hashes_array(matrix):
+    a = matrix[:, :8].copy().view("<u8").ravel()
+    b = matrix[:, 8:16].copy().view("<u8").ravel()
+    with np.errstate(over="ignore"):
+        h1 = _mix_array(a ^ _mix_array(b ^ matrix[:, 16].astype(np.uint64)))
+        return h1, _mix_array(h1 ^ b) | np.uint64(1)
+
+
+def corpus_files(data_dir):
+    return [path for path in sorted(glob.glob(os.path.join(data_dir, "make_*.txt")))
+            if os.path.basename(path) != "make_name.txt"]
+
+
+def read_vin_chunks(path, chunk_bytes=16 << 20):
+    # Yields S17 arrays of the 17-character lines, one chunk at a time
+    with open(path, "rb") as f:
+        rest = b""
+        while True:
+            block = f.read(chunk_bytes)
+            data = rest + block
+            if block:
+                cut = data.rfind(b"\n") + 1
+                data, rest = data[:cut], data[cut:]
+            vins = [line for line in data.split() if len(line) == 17]
+            if vins:
+                yield np.array(vins, dtype="S17")
+            if not block:
+                return
+
+
+def corpus_size(data_dir):
+    return sum(os.path.getsize(path) for path in corpus_files(data_dir))
+
+
+class VinDeduper:
+    def __init__(self, data_dir="vin_data", capacity=10_000_000, error_rate=1e-4, db=None):
+        # db: the vin_db.VinDatabase of the sqlite backend, whose VINs are
+        # in the filter alongside any make files
+        self.data_dir = data_dir
+        self.db = db
+        self.path = os.path.join(data_dir, "vin_bloom.bin")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        os.makedirs(data_dir, exist_ok=True)
+        if not self._load():
+            self.rebuild()
+
+    def _allocate(self, capacity):
+        self.num_bits = max(64, int(-capacity * math.log(self.error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def _corpus_size(self):
+        # Make file bytes, plus 18 per VIN in the database
+        size = corpus_size(self.data_dir)
+        if self.db is not None:
+            size += self.db.count() * 18
+        return size
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) != HEADER.size:
+                return False
+            magic, num_bits, num_hashes, count, size = HEADER.unpack(header)
+            # A corpus that changed since the last save means the filter is stale
+            if magic != MAGIC or size != self._corpus_size():
+                return False
+            # Rebuild a larger filter once this one is past its sized capacity
+            sized_for = num_bits * math.log(2) ** 2 / -math.log(self.error_rate)
+            if count > sized_for or sized_for < self.capacity * 0.99:
+                return False
+            bits = np.fromfile(f, dtype=np.uint8)
+        if len(bits) != (num_bits + 7) // 8:
+            return False
+        self.num_bits, self.num_hashes, self.count, self.bits = num_bits, num_hashes, count, bits
+        return True
+
+    def rebuild(self):
+        # Sized from the corpus bytes (18 per VIN) and fed file by file (then
+        # from the database) in chunks, so memory stays bounded by the filter
+        self._allocate(max(self.capacity, self._corpus_size() // 18 * 2))
+        for path in corpus_files(self.data_dir):
+            for vins in read_vin_chunks(path):
+                self.add_many(vins)
+        if self.db is not None:
+            for vins in self.db.iter_vins():
+                self.add_many(vins)
+        self.save()
+
+    def _positions(self, vin):
+        h1, h2 = _hashes(vin)
+        return [((h1 + i * h2) & _MASK) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, vin):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(vin))
+
+    def add(self, vin):
+        # Returns False when the VIN was (probably) seen before
+        positions = self._positions(vin)
+        bits = self.bits
+        if all(bits[p >> 3] & (1 << (p & 7)) for p in positions):
+            return False
+        for p in positions:
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+        return True
+
+    def add_many(self, vins):
+        matrix = np.asarray(vins, dtype="S17").view(np.uint8).reshape(-1, 17)
+        h1, h2 = _hashes_array(matrix)
+        num_bits = np.uint64(self.num_bits)
+        with np.errstate(over="ignore"):
+            for i in range(self.num_hashes):
+                positions = (h1 + np.uint64(i) * h2) % num_bits
+                np.bitwise_or.at(self.bits, positions >> np.uint64(3),
+                                 np.left_shift(1, positions & np.uint64(7)).astype(np.uint8))
+        self.count += len(matrix)
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.num_bits, self.num_hashes, self.count, self._corpus_size()))
+            self.bits.tofile(f)
+        os.replace(tmp_path, self.path)
+
+
+if __name__ == "__main__":
+    from vin_db import BACKEND, VinDatabase
+
+    deduper = VinDeduper(db=VinDatabase() if BACKEND == "sqlite" else None)
+    deduper.rebuild()
+    print(f"✅ Rebuilt Bloom filter: {deduper.count} VINs, {deduper.num_bits} bits, {deduper.num_hashes} hashes")
@@ -0,0 +1,277 @@
+# vin_export.py
+# Columnar export of the corpus for analytics:
+#   python vin_export.py              # export VINs appended since the last run
+#   python vin_export.py --compact    # then merge each make's parts into one file
+# VINs are decoded with vin_decoder.decode_many and written as Parquet under
+# vin_data/parquet/make=<Make>/, one part per export run, with the low-
+# cardinality columns dictionary-encoded. Alongside the parts, _summary.json
+# keeps pre-aggregated counts (per make: model years, plants, regions, WMIs,
+# invalid check digits) plus the corpus size at every export, so the
+# analytics page reads a few KB however large the corpus gets.
+#
+# Like vin_index, only records appended since the last export are read; a
+# make file that shrank or was replaced has its partition rebuilt.
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+
+from vin_decoder import decode_many
+from vin_dedupe import corpus_files
+from vin_index import CHUNK_SIZE, RECORD_SIZE, read_records
+
+EXPORT_DIR = os.path.join("vin_data", "parquet")
+SUMMARY_NAME = "_summary.json"  # "_" keeps Parquet dataset readers off it
+HISTORY_LIMIT = 10_000  # export runs kept for the collection-rate chart
+DICTIONARY_COLUMNS = ("wmi", "region", "plant_code", "plant")
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet export needs pyarrow: pip install pyarrow")
+    return pa, pq
+
+
+def _schema(pa):
+    # make is the partition key, so it lives in the directory name only
+    dictionary = pa.dictionary(pa.int16(), pa.string())
+    return pa.schema([("vin", pa.string()), ("wmi", dictionary), ("region", dictionary),
+                      ("model_year", pa.int16()), ("plant_code", dictionary), ("plant", dictionary),
+                      ("valid", pa.bool_())])
+
+
+def _tmp_path(path):
+    # Dot-prefixed, so dataset readers skip parts still being written
+    head, tail = os.path.split(path)
+    return os.path.join(head, f".{tail}.tmp")
+
+
+def _part_range(path):
+    # part-<start>-<stop>.parquet -> (start, stop) in records
+    start, stop = os.path.basename(path)[len("part-"):-len(".parquet")].split("-")
+    return int(start), int(stop)
+
+
+def _tally(values):
+    keys, counts = np.unique(values, return_counts=True)
+    return Counter({str(key): int(count) for key, count in zip(keys.tolist(), counts.tolist())})
+
+
+def empty_summary():
+    return {"updated_at": None, "makes": {}, "files": {}, "history": []}
+
+
+def load_summary(export_dir=EXPORT_DIR):
+    path = os.path.join(export_dir, SUMMARY_NAME)
+    if not os.path.exists(path):
+        return empty_summary()
+    with open(path) as f:
+        return json.load(f)
+
+
+def summary_totals(summary):
+    # Corpus-wide aggregates derived from the per-make ones
+    totals = {"count": 0, "invalid": 0, "model_years": Counter(), "regions": Counter(), "plants": Counter()}
+    for stats in summary["makes"].values():
+        totals["count"] += stats["count"]
+        totals["invalid"] += stats["invalid"]
+        for field in ("model_years", "regions", "plants"):
+            totals[field].update(stats[field])
+    return totals
+
+
+class VinExporter:
+    def __init__(self, data_dir="vin_data", export_dir=EXPORT_DIR, chunk_size=CHUNK_SIZE):
+        self.data_dir = data_dir
+        self.export_dir = export_dir
+        self.chunk_size = chunk_size
+        self.pa, self.pq = _pyarrow()
+        self.schema = _schema(self.pa)
+        self.summary = load_summary(export_dir)
+        self.skipped = []
+
+    def _partition(self, make):
+        return os.path.join(self.export_dir, f"make={make}")
+
+    def parts(self, make):
+        return sorted(glob.glob(os.path.join(self._partition(make), "part-*.parquet")))
+
+    def _drop_covered(self, make):
+        # A compaction that died after renaming the merged part leaves the
+        # parts it merged behind; they lie inside its record range
+        covered_to = -1
+        for part in sorted(self.parts(make), key=lambda part: (_part_range(part)[0], -_part_range(part)[1])):
+            start, stop = _part_range(part)
+            if stop <= covered_to:
+                os.remove(part)
+            covered_to = max(covered_to, stop)
+
+    def _drop_make(self, make):
+        shutil.rmtree(self._partition(make), ignore_errors=True)
+        self.summary["makes"].pop(make, None)
+
+    def export(self):
+        # Export every record appended since the last run; returns the number
+        # of newly exported VINs
+        os.makedirs(self.export_dir, exist_ok=True)
+        added = 0
+        paths = corpus_files(self.data_dir)
+        names = {os.path.basename(path) for path in paths}
+        for name in list(self.summary["files"]):
+            if name not in names:
+                self._drop_make(name[len("make_"):-len(".txt")])
+                del self.summary["files"][name]
+        for path in paths:
+            name = os.path.basename(path)
+            make = name[len("make_"):-len(".txt")]
+            stat = os.stat(path)
+            total = stat.st_size // RECORD_SIZE
+            state = self.summary["files"].get(name)
+            if state is None or stat.st_ino != state["inode"] or total < state["records"]:
+                # New, or rewritten (e.g. vin_validator --repair): start over
+                self._drop_make(make)
+                state = self.summary["files"][name] = {"records": 0, "inode": stat.st_ino}
+            start = state["records"]
+            if start == total:
+                continue
+            exported = self._export_file(path, make, start, total)
+            if exported is None:
+                if name not in self.skipped:
+                    self.skipped.append(name)
+                    print(f"⚠️ {name} has malformed lines; run vin_validator.py --repair to export it",
+                          file=sys.stderr)
+                continue
+            state["records"] = start + exported
+            added += exported
+
+        self.summary["updated_at"] = time.time()
+        history = self.summary["history"]
+        history.append([self.summary["updated_at"], summary_totals(self.summary)["count"]])
+        del history[:-HISTORY_LIMIT]
+        self.save_summary()
+        return added
+
+    def _export_file(self, path, make, start, stop):
+        # One part file per run for records [start, stop); None if the file
+        # has malformed lines. The part is renamed into place before the
+        # summary that counts it is saved
+        partition = self._partition(make)
+        os.makedirs(partition, exist_ok=True)
+        self._drop_covered(make)
+        for orphan in self.parts(make):
+            # Left behind by a run that died before saving the summary
+            if _part_range(orphan)[0] >= start:
+                os.remove(orphan)
+        part = os.path.join(partition, f"part-{start:09d}-{stop:09d}.parquet")
+        tmp_path = _tmp_path(part)
+        stats = self.summary["makes"].setdefault(make, {
+            "count": 0, "invalid": 0, "model_years": {}, "regions": {}, "plants": {}, "wmis": {}})
+        tally = {field: Counter(stats[field]) for field in ("model_years", "regions", "plants", "wmis")}
+        count = invalid = 0
+        malformed = False
+        writer = self._writer(tmp_path)
+        try:
+            for chunk_start in range(start, stop, self.chunk_size):
+                vins = read_records(path, chunk_start, min(chunk_start + self.chunk_size, stop))
+                if vins is None:
+                    malformed = True
+                    break
+                decoded = decode_many(vins)
+                writer.write_table(self._table(decoded))
+                count += len(vins)
+                invalid += int((~decoded["valid"]).sum())
+                years = decoded["model_year"]
+                tally["model_years"].update(_tally(years[years > 0]))
+                tally["regions"].update(_tally(decoded["region"][decoded["region"] != None].astype(str)))
+                tally["plants"].update(_tally(decoded["plant_code"].astype(str)))
+                tally["wmis"].update(_tally(decoded["wmi"].astype(str)))
+        except BaseException:
+            writer.close()
+            os.remove(tmp_path)
+            raise
+        writer.close()
+        if malformed:
+            os.remove(tmp_path)
+            return None
+        os.replace(tmp_path, part)
+        stats["count"] += count
+        stats["invalid"] += invalid
+        for field, counter in tally.items():
+            stats[field] = dict(counter.most_common())
+        return count
+
+    def _writer(self, path):
+        return self.pq.ParquetWriter(path, self.schema, use_dictionary=list(DICTIONARY_COLUMNS),
+                                     compression="zstd")
+
+    def _table(self, decoded):
+        pa = self.pa
+        columns = [pa.array(decoded["vin"].astype(str))]
+        for field in self.schema:
+            if field.name == "vin":
+                continue
+            values = decoded[field.name]
+            if pa.types.is_dictionary(field.type):
+                # Unknown regions and plants stay null
+                column = pa.array(values if values.dtype == object else values.astype(str), type=pa.string())
+                columns.append(column.dictionary_encode().cast(field.type))
+            elif field.name == "model_year":
+                columns.append(pa.array(values, mask=values == 0))
+            else:
+                columns.append(pa.array(values))
+        return pa.Table.from_arrays(columns, schema=self.schema)
+
+    def compact(self, make):
+        # Merge a make's parts into one file; returns the number merged
+        self._drop_covered(make)
+        parts = self.parts(make)
+        if len(parts) < 2:
+            return 0
+        merged = os.path.join(self._partition(make), f"part-{_part_range(parts[0])[0]:09d}-"
+                                                     f"{_part_range(parts[-1])[1]:09d}.parquet")
+        with self._writer(_tmp_path(merged)) as writer:
+            for part in parts:
+                writer.write_table(self.pq.read_table(part, schema=self.schema))
+        # The merged part is in place before any source goes, so a crash in
+        # between leaves duplicates for _drop_covered, never a gap
+        os.replace(_tmp_path(merged), merged)
+        for part in parts:
+            if part != merged:
+                os.remove(part)
+        return len(parts)
+
+    def save_summary(self):
+        path = os.path.join(self.export_dir, SUMMARY_NAME)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.summary, f)
+        os.replace(path + ".tmp", path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the VIN corpus to partitioned Parquet")
+    parser.add_argument("--data-dir", default="vin_data")
+    parser.add_argument("--output", default=EXPORT_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="discard the existing export first")
+    parser.add_argument("--compact", action="store_true", help="merge each make's parts into one file")
+    args = parser.parse_args()
+
+    if args.rebuild and os.path.exists(args.output):
+        shutil.rmtree(args.output)
+    start = time.perf_counter()
+    exporter = VinExporter(args.data_dir, args.output)
+    added = exporter.export()
+    print(f"[{datetime.now()}] ✅ Exported {added} new VINs "
+          f"({summary_totals(exporter.summary)['count']} total, {time.perf_counter() - start:.2f}s)")
+    if args.compact:
+        merged = sum(exporter.compact(make) for make in exporter.summary["makes"])
+        print(f"[{datetime.now()}] 🗜️ Compacted {merged} part files")
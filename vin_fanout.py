@@ -0,0 +1,77 @@
+# vin_fanout.py
+# Speculative fan-out for manufacturer-specific fetches: fire just enough
+# parallel upstream requests to find a matching VIN within a target
+# latency, cancel the rest on the first match, and give up on a budget.
+import asyncio
+import math
+import time
+from collections import Counter
+
+
+class HitRateTracker:
+    # Every upstream response tells us which WMI it belonged to, so the hit
+    # rate for any make is learned from all traffic, not just its own fetches
+    def __init__(self, prior_rate=0.01, prior_weight=20, latency=0.5, alpha=0.2):
+        self.prior_rate = prior_rate
+        self.prior_weight = prior_weight
+        self.alpha = alpha
+        self.latency = latency
+        self.total = 0
+        self.wmi_counts = Counter()
+
+    def observe(self, vin, latency):
+        self.total += 1
+        self.wmi_counts[vin[:3]] += 1
+        self.latency += self.alpha * (latency - self.latency)
+
+    def hit_rate(self, prefixes):
+        prefixes = (prefixes,) if isinstance(prefixes, str) else tuple(prefixes)
+        hits = sum(count for wmi, count in self.wmi_counts.items() if wmi.startswith(prefixes))
+        return (hits + self.prior_rate * self.prior_weight) / (self.total + self.prior_weight)
+
+
+def fanout_size(hit_rate, latency, target_latency, confidence=0.95, max_parallel=64):
+    # Attempts needed for P(at least one hit) >= confidence, spread over the
+    # number of request rounds that fit in the target latency
+    if hit_rate >= 1:
+        return 1
+    needed = math.log(1 - confidence) / math.log(1 - hit_rate)
+    rounds = max(1.0, target_latency / max(latency, 1e-3))
+    return max(1, min(max_parallel, math.ceil(needed / rounds)))
+
+
+async def fetch_matching_vin(fetch, prefixes, tracker, target_latency=2.0,
+                             max_attempts=500, timeout=15.0, max_parallel=64):
+    # fetch: coroutine function returning one upstream response body
+    prefixes = (prefixes,) if isinstance(prefixes, str) else tuple(prefixes)
+    deadline = time.monotonic() + timeout
+    attempts = 0
+
+    async def timed_fetch():
+        start = time.monotonic()
+        vin = (await fetch()).strip()
+        tracker.observe(vin, time.monotonic() - start)
+        return vin
+
+    while attempts < max_attempts:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        size = fanout_size(tracker.hit_rate(prefixes), tracker.latency, target_latency,
+                           max_parallel=max_parallel)
+        size = min(size, max_attempts - attempts)
+        attempts += size
+        pending = {asyncio.ensure_future(timed_fetch()) for _ in range(size)}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=deadline - time.monotonic(),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    return None
+                for task in done:
+                    if not task.exception() and task.result().startswith(prefixes):
+                        return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+    return None
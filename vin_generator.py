@@ -0,0 +1,68 @@
+# vin_generator.py
+# Offline VIN synthesis: builds structurally valid VINs for a given WMI
+# without touching the network.
+import random
+from datetime import datetime
+
+# Letters I, O and Q are never used in a VIN
+VIN_ALPHABET = "ABCDEFGHJKLMNPRSTUVWXYZ0123456789"
+VIN_DIGITS = "0123456789"
+
+# ISO 3779 / 49 CFR 565 transliteration and position weights
+TRANSLITERATION = {
+    "A": 1, "B": 2, "C": 3, "D": 4, "E": 5, "F": 6, "G": 7, "H": 8,
+    "J": 1, "K": 2, "L": 3, "M": 4, "N": 5, "P": 7, "R": 9,
+    "S": 2, "T": 3, "U": 4, "V": 5, "W": 6, "X": 7, "Y": 8, "Z": 9,
+}
+TRANSLITERATION.update({d: int(d) for d in VIN_DIGITS})
+WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+
+# Position 10 cycles through these 30 codes; "A" is 1980 and again 2010
+MODEL_YEAR_CODES = "ABCDEFGHJKLMNPRSTVWXY123456789"
+MODEL_YEAR_BASE = 1980
+
+
+def compute_check_digit(vin):
+    total = sum(TRANSLITERATION[c] * w for c, w in zip(vin, WEIGHTS))
+    remainder = total % 11
+    return "X" if remainder == 10 else str(remainder)
+
+
+def model_year_code(year):
+    return MODEL_YEAR_CODES[(year - MODEL_YEAR_BASE) % 30]
+
+
+def model_year(vin):
+    # A letter at position 7 puts the year code in the 2010-2039 cycle
+    index = MODEL_YEAR_CODES.find(vin[9])
+    if index < 0:
+        return None
+    return MODEL_YEAR_BASE + index + (30 if vin[6].isalpha() else 0)
+
+
+def generate_vin(wmi, year=None, rng=random):
+    if len(wmi) != 3 or any(c not in VIN_ALPHABET for c in wmi):
+        raise ValueError(f"Invalid WMI: {wmi!r}")
+    if year is None:
+        year = rng.randint(MODEL_YEAR_BASE, datetime.now().year)
+
+    # Position 7 tells decoders which 30-year cycle the year code is in:
+    # a digit for 1980-2009, a letter from 2010 onwards
+    vds = [rng.choice(VIN_ALPHABET) for _ in range(5)]
+    vds[3] = rng.choice(VIN_ALPHABET[:-10] if year >= 2010 else VIN_DIGITS)
+
+    plant = rng.choice(VIN_ALPHABET)
+    serial = "".join(rng.choice(VIN_DIGITS) for _ in range(6))
+
+    vin = wmi + "".join(vds) + "0" + model_year_code(year) + plant + serial
+    return vin[:8] + compute_check_digit(vin) + vin[9:]
+
+
+def generate_vins(wmi, count, year=None, rng=random):
+    return [generate_vin(wmi, year, rng) for _ in range(count)]
+
+
+if __name__ == "__main__":
+    import sys
+    for wmi in sys.argv[1:] or ["1FT"]:
+        print(generate_vin(wmi.upper()))
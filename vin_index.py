@@ -0,0 +1,360 @@
+# vin_index.py
+# Secondary indexes over vin_data/make_*.txt for filtered sampling:
+#   python vin_index.py build
+#   python vin_index.py sample --make Ford --years 2015-2018 --plant F -n 5
+# Every VIN is addressed by (file number, record number) packed into a
+# uint32, and each of WMI, model year and plant keeps a sorted posting list
+# of those ids per value. Make needs no list: a make is one file, so it is
+# a contiguous id range. Queries intersect the smallest lists first, cache
+# the result, and draw uniformly from it with a single mmap read.
+#
+# Make files only grow, so refresh() indexes just the records appended
+# since the last build; a file that shrank or was replaced is re-indexed.
+# Likewise save() writes only the postings added since the last save, as a
+# small delta segment next to the base file; every MERGE_SEGMENTS deltas
+# (or after a file was re-indexed) they are merged into a new base.
+import argparse
+import glob
+import mmap
+import os
+import random
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from vin_decoder import decode_many
+from vin_dedupe import corpus_files
+
+INDEX_NAME = "vin_index.npz"
+DELTA_PATTERN = "vin_index.delta-*.npz"
+MERGE_SEGMENTS = 8
+RECORD_SIZE = 18
+RECORD_BITS = 24  # up to 16.7M VINs per make, 256 make files
+FIELDS = ("wmi", "model_year", "plant")
+CHUNK_SIZE = 1_000_000
+
+
+def read_records(path, start, stop):
+    # Whole 18-byte records [start, stop) as an S17 array, or None if any
+    # of them is not newline-terminated (a file with malformed lines)
+    with open(path, "rb") as f:
+        f.seek(start * RECORD_SIZE)
+        data = f.read((stop - start) * RECORD_SIZE)
+    records = np.frombuffer(data, dtype=np.uint8).reshape(-1, RECORD_SIZE)
+    if not (records[:, 17] == ord("\n")).all():
+        return None
+    return np.ascontiguousarray(records[:, :17]).view("S17").ravel()
+
+
+def _group(keys, ids):
+    # -> {key: sorted ids}; a stable sort keeps ids ascending within a key
+    order = np.argsort(keys, kind="stable")
+    keys, ids = keys[order], ids[order]
+    values, starts = np.unique(keys, return_index=True)
+    return {value: chunk for value, chunk in zip(values.tolist(), np.split(ids, starts[1:]))}
+
+
+def _merge(postings, key, chunk):
+    existing = postings.get(key)
+    if existing is None:
+        postings[key] = chunk
+    elif existing[-1] < chunk[0]:
+        postings[key] = np.concatenate((existing, chunk))
+    else:
+        postings[key] = np.sort(np.concatenate((existing, chunk)))
+
+
+def _delta_seq(path):
+    # vin_index.delta-<seq>.npz -> seq
+    return int(os.path.basename(path)[len("vin_index.delta-"):-len(".npz")])
+
+
+def remove_index(data_dir="vin_data"):
+    # The base file and every delta segment
+    for path in [os.path.join(data_dir, INDEX_NAME)] + glob.glob(os.path.join(data_dir, DELTA_PATTERN)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class VinIndex:
+    def __init__(self, data_dir="vin_data", cache_size=64):
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, INDEX_NAME)
+        self.files = []    # make file names; position is the file number
+        self.counts = []   # records indexed per file
+        self.inodes = []
+        self.postings = {field: {} for field in FIELDS}
+        # Postings added since the last save, and whether that save must
+        # rewrite the base (a dropped file can't be expressed as a delta)
+        self._unsaved = {field: {} for field in FIELDS}
+        self._rewrite = True
+        self._seq = 0  # last delta segment written or loaded
+        self.skipped = []
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._maps = {}
+
+    @classmethod
+    def open(cls, data_dir="vin_data"):
+        # Load the saved index if there is one, then catch up with appends
+        index = cls(data_dir)
+        if os.path.exists(index.path):
+            index._load()
+        index.refresh()
+        return index
+
+    def refresh(self):
+        # Index new files and records appended since the last refresh;
+        # returns the number of newly indexed VINs
+        added = 0
+        for path in corpus_files(self.data_dir):
+            name = os.path.basename(path)
+            stat = os.stat(path)
+            total = stat.st_size // RECORD_SIZE
+            if name not in self.files:
+                if len(self.files) >= 1 << (32 - RECORD_BITS):
+                    raise ValueError("too many make files for the index id space")
+                self.files.append(name)
+                self.counts.append(0)
+                self.inodes.append(stat.st_ino)
+            file_no = self.files.index(name)
+            if stat.st_ino != self.inodes[file_no] or total < self.counts[file_no]:
+                # Rewritten (e.g. vin_validator --repair): start the file over
+                self._drop_file(file_no)
+                self.inodes[file_no] = stat.st_ino
+            if total >= 1 << RECORD_BITS:
+                raise ValueError(f"{name} has more VINs than the index can address")
+            for start in range(self.counts[file_no], total, CHUNK_SIZE):
+                stop = min(start + CHUNK_SIZE, total)
+                vins = read_records(path, start, stop)
+                if vins is None:
+                    if name not in self.skipped:
+                        self.skipped.append(name)
+                        print(f"⚠️ {name} has malformed lines; run vin_validator.py --repair to index it",
+                              file=sys.stderr)
+                    break
+                self._add_records(file_no, start, vins)
+                self.counts[file_no] = stop
+                added += stop - start
+        if added:
+            self._cache.clear()
+        return added
+
+    def _add_records(self, file_no, start, vins):
+        ids = (np.uint32(file_no) << np.uint32(RECORD_BITS)) + np.arange(start, start + len(vins),
+                                                                        dtype=np.uint32)
+        decoded = decode_many(vins)
+        columns = {"wmi": decoded["wmi"].astype(str), "model_year": decoded["model_year"],
+                   "plant": decoded["plant_code"].astype(str)}
+        for field, keys in columns.items():
+            for key, chunk in _group(keys, ids).items():
+                _merge(self.postings[field], key, chunk)
+                _merge(self._unsaved[field], key, chunk)
+
+    def _drop_file(self, file_no):
+        lo, hi = self._id_range(file_no)
+        for postings in self.postings.values():
+            for key, ids in list(postings.items()):
+                kept = ids[(ids < lo) | (ids >= hi)]
+                if len(kept):
+                    postings[key] = kept
+                else:
+                    del postings[key]
+        self.counts[file_no] = 0
+        self._rewrite = True
+        if self.files[file_no] in self.skipped:
+            self.skipped.remove(self.files[file_no])
+        self._close_map(file_no)
+        self._cache.clear()
+
+    def _delta_paths(self):
+        return sorted(glob.glob(os.path.join(self.data_dir, DELTA_PATTERN)), key=_delta_seq)
+
+    def save(self):
+        # A delta segment with just the unsaved postings, or a whole new
+        # base once the deltas pile up; either way the file list and counts
+        # are saved in full (they are a few entries per make)
+        deltas = self._delta_paths()
+        if self._rewrite or len(deltas) >= MERGE_SEGMENTS:
+            # The base records the last delta it includes, so a crash before
+            # the deltas are removed can't apply them twice
+            self._write(self.path, self.postings, base_seq=self._seq)
+            for path in deltas:
+                os.remove(path)
+            self._rewrite = False
+        elif any(self._unsaved.values()):
+            self._seq += 1
+            self._write(os.path.join(self.data_dir, f"vin_index.delta-{self._seq:06d}.npz"), self._unsaved)
+        self._unsaved = {field: {} for field in FIELDS}
+
+    def _write(self, path, postings_by_field, base_seq=0):
+        arrays = {"files": np.array(self.files, dtype=str), "counts": np.array(self.counts, dtype=np.int64),
+                  "inodes": np.array(self.inodes, dtype=np.int64), "base_seq": np.int64(base_seq)}
+        for field, postings in postings_by_field.items():
+            keys = list(postings)
+            lengths = [len(postings[key]) for key in keys]
+            arrays[f"{field}_keys"] = np.array(keys)
+            arrays[f"{field}_offsets"] = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+            arrays[f"{field}_ids"] = (np.concatenate([postings[key] for key in keys]) if keys
+                                      else np.empty(0, dtype=np.uint32))
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    def _read(self, path):
+        # Replaces the file list and counts with the file's; -> its postings
+        with np.load(path) as data:
+            self.files = data["files"].tolist()
+            self.counts = data["counts"].tolist()
+            self.inodes = data["inodes"].tolist()
+            base_seq = int(data["base_seq"]) if "base_seq" in data else 0
+            postings = {}
+            for field in FIELDS:
+                keys, offsets, ids = data[f"{field}_keys"], data[f"{field}_offsets"], data[f"{field}_ids"]
+                postings[field] = {key: ids[offsets[i]:offsets[i + 1]] for i, key in enumerate(keys.tolist())}
+        return postings, base_seq
+
+    def _load(self):
+        self.postings, self._seq = self._read(self.path)
+        for path in self._delta_paths():
+            if _delta_seq(path) <= self._seq:
+                continue  # already merged into the base
+            postings, _ = self._read(path)
+            for field, chunks in postings.items():
+                for key, chunk in chunks.items():
+                    _merge(self.postings[field], key, chunk)
+            self._seq = _delta_seq(path)
+        self._rewrite = False
+
+    def _id_range(self, file_no):
+        lo = file_no << RECORD_BITS
+        return lo, lo + (1 << RECORD_BITS)
+
+    def _field_ids(self, field, values):
+        postings = self.postings[field]
+        lists = [postings[value] for value in values if value in postings]
+        if not lists:
+            return np.empty(0, dtype=np.uint32)
+        # Different keys never share an id, so a union is a concatenation
+        return lists[0] if len(lists) == 1 else np.sort(np.concatenate(lists))
+
+    def query(self, make=None, wmi=None, years=None, plant=None):
+        # -> sorted array of ids matching every given filter; years is a
+        # single year or an inclusive (first, last) pair
+        if isinstance(years, int):
+            years = (years, years)
+        key = (make, wmi, tuple(years) if years else None, plant)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        lists = []
+        if wmi:
+            lists.append(self._field_ids("wmi", [wmi]))
+        if years:
+            lists.append(self._field_ids("model_year", range(years[0], years[1] + 1)))
+        if plant:
+            lists.append(self._field_ids("plant", [plant]))
+
+        if make is not None:
+            name = f"make_{make}.txt"
+            if name not in self.files:
+                return self._remember(key, np.empty(0, dtype=np.uint32))
+            file_no = self.files.index(name)
+            lo, hi = self._id_range(file_no)
+            if lists:
+                # A make is a contiguous id range: slice instead of intersect
+                lists = [ids[np.searchsorted(ids, lo):np.searchsorted(ids, hi)] for ids in lists]
+            else:
+                lists = [np.arange(lo, lo + self.counts[file_no], dtype=np.uint32)]
+        elif not lists:
+            ranges = [np.arange(self._id_range(i)[0], self._id_range(i)[0] + count, dtype=np.uint32)
+                      for i, count in enumerate(self.counts)]
+            lists = [np.concatenate(ranges) if ranges else np.empty(0, dtype=np.uint32)]
+
+        lists.sort(key=len)
+        result = lists[0]
+        for ids in lists[1:]:
+            result = np.intersect1d(result, ids, assume_unique=True)
+        return self._remember(key, result)
+
+    def _remember(self, key, result):
+        self._cache[key] = result
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def count(self, **filters):
+        return len(self.query(**filters))
+
+    def _map(self, file_no):
+        mapped = self._maps.get(file_no)
+        if mapped is None or len(mapped[1]) < self.counts[file_no] * RECORD_SIZE:
+            self._close_map(file_no)
+            f = open(os.path.join(self.data_dir, self.files[file_no]), "rb")
+            mapped = self._maps[file_no] = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        return mapped[1]
+
+    def _close_map(self, file_no):
+        mapped = self._maps.pop(file_no, None)
+        if mapped is not None:
+            mapped[1].close()
+            mapped[0].close()
+
+    def vin(self, vin_id):
+        vin_id = int(vin_id)
+        file_no, record = vin_id >> RECORD_BITS, vin_id & ((1 << RECORD_BITS) - 1)
+        start = record * RECORD_SIZE
+        return self._map(file_no)[start:start + 17].decode()
+
+    def sample(self, rng=random, **filters):
+        ids = self.query(**filters)
+        if not len(ids):
+            return None
+        return self.vin(ids[rng.randrange(len(ids))])
+
+    def close(self):
+        for file_no in list(self._maps):
+            self._close_map(file_no)
+
+
+def parse_years(value):
+    first, _, last = value.partition("-")
+    return int(first), int(last or first)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build and query the VIN secondary indexes")
+    parser.add_argument("command", choices=["build", "update", "count", "sample"])
+    parser.add_argument("--data-dir", default="vin_data")
+    parser.add_argument("--make", default=None)
+    parser.add_argument("--wmi", default=None)
+    parser.add_argument("--years", type=parse_years, default=None, help="e.g. 2015 or 2015-2018")
+    parser.add_argument("--plant", default=None, help="position-11 plant code")
+    parser.add_argument("-n", "--count", type=int, default=1)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "build":
+        remove_index(args.data_dir)
+    index = VinIndex.open(args.data_dir)
+    if args.command in ("build", "update"):
+        index.save()
+        print(f"[{datetime.now()}] ✅ Indexed {sum(index.counts)} VINs in {len(index.files)} files "
+              f"({time.perf_counter() - start:.2f}s)")
+        sys.exit(0)
+
+    filters = {"make": args.make, "wmi": args.wmi, "years": args.years, "plant": args.plant}
+    if args.command == "count":
+        print(index.count(**filters))
+    else:
+        for _ in range(args.count):
+            vin = index.sample(**filters)
+            if vin is None:
+                sys.exit("❌ No VINs match those filters")
+            print(vin)
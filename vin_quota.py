@@ -0,0 +1,119 @@
+# vin_quota.py
+# Per-make collection targets. The upstream hands out random VINs, so the
+# only lever is what we do with each one: VINs for makes that still lack
+# VINs are saved, matches for full makes go to a small capped overflow (or
+# are dropped), and collection stops once every target is met. Observed
+# per-make hit rates give a projected time to completion.
+import argparse
+import math
+import os
+import time
+from collections import Counter
+
+from vin_dedupe import corpus_files
+from vin_sampler import RECORD_SIZE
+from wmi_registry import WMI_REGISTRY
+
+# Same prior as vin_fanout.HitRateTracker: an unseen make is assumed rare
+PRIOR_RATE = 0.01
+PRIOR_WEIGHT = 20
+
+
+def parse_quota(value):
+    # "Ford=100,Bugatti=5" -> {"Ford": 100, "Bugatti": 5}
+    targets = {}
+    for item in value.split(","):
+        make, _, count = item.partition("=")
+        make = make.strip()
+        if make not in WMI_REGISTRY:
+            raise argparse.ArgumentTypeError(f"unknown make: {make}")
+        try:
+            targets[make] = int(count)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"quota for {make} must be an integer")
+    return targets
+
+
+def stored_counts(data_dir, db=None):
+    # Current corpus size per make in whole 18-byte records, the same count
+    # vin_stats verifies against
+    if db is not None:
+        return {make: db.count(make) for make in db.makes()}
+    return {os.path.basename(path)[len("make_"):-len(".txt")]: os.path.getsize(path) // RECORD_SIZE
+            for path in corpus_files(data_dir)}
+
+
+class QuotaTracker:
+    def __init__(self, targets, initial=None, overflow_cap=0, overflow_initial=None):
+        self.targets = dict(targets)
+        self.counts = Counter({make: (initial or {}).get(make, 0) for make in self.targets})
+        self.overflow_cap = overflow_cap
+        self.overflow = Counter(overflow_initial or {})
+        self.dropped = 0
+        self.fetched = 0
+        self.accepted = Counter()
+        self.started = time.monotonic()
+
+    def wants(self, make):
+        # Makes without a target are treated as already full
+        return make in self.targets and self.counts[make] < self.targets[make]
+
+    def observe(self):
+        # One valid VIN from the upstream, whatever its make
+        self.fetched += 1
+
+    def record(self, make):
+        self.counts[make] += 1
+        self.accepted[make] += 1
+
+    def take_overflow(self, make):
+        # True if a match for a full make may still go to the overflow
+        if self.overflow[make] < self.overflow_cap:
+            self.overflow[make] += 1
+            return True
+        self.dropped += 1
+        return False
+
+    def remaining(self):
+        return {make: target - self.counts[make] for make, target in self.targets.items()
+                if self.counts[make] < target}
+
+    def done(self):
+        return not self.remaining()
+
+    def progress(self):
+        total = sum(self.targets.values())
+        have = sum(min(self.counts[make], target) for make, target in self.targets.items())
+        return have / total if total else 1.0
+
+    def hit_rate(self, make):
+        # Saved VINs per valid upstream VIN, so duplicates count against a make
+        return (self.accepted[make] + PRIOR_RATE * PRIOR_WEIGHT) / (self.fetched + PRIOR_WEIGHT)
+
+    def fetch_rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.fetched / elapsed if elapsed > 0 else 0.0
+
+    def eta(self):
+        # Seconds until the slowest unfinished make is expected to be full
+        remaining = self.remaining()
+        if not remaining:
+            return 0.0
+        rate = self.fetch_rate()
+        if not rate:
+            return math.inf
+        return max(count / (self.hit_rate(make) * rate) for make, count in remaining.items())
+
+    def bottlenecks(self, limit=3):
+        # Unfinished makes ordered by projected time to fill
+        remaining = self.remaining()
+        return sorted(remaining, key=lambda make: remaining[make] / self.hit_rate(make),
+                      reverse=True)[:limit]
+
+
+def format_eta(seconds):
+    if seconds == math.inf:
+        return "unknown"
+    hours, rest = divmod(int(seconds), 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{secs:02d}s"
@@ -0,0 +1,112 @@
+# vin_reservoir.py
+# Bounded ready-to-serve VIN pools per make, topped up by a background
+# thread so request handlers only ever pop from memory.
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+class VinReservoir:
+    def __init__(self, makes, sources, fallback_sources=(), capacity=50, low_water=10, idle_wait=1.0,
+                 retry_delay=30.0):
+        # sources: callables (make, count) -> list of VINs, tried in order.
+        # fallback_sources (e.g. upstream fetches, which can take seconds)
+        # get their own refill thread, so they never hold up the others, and
+        # only top up makes the sources have nothing new for
+        self.capacity = capacity
+        self.low_water = low_water
+        self.idle_wait = idle_wait
+        self.retry_delay = retry_delay
+        self.pools = {make: deque() for make in makes}
+        self.served = 0
+        self.misses = 0
+        self._tiers = [list(sources)] + ([list(fallback_sources)] if fallback_sources else [])
+        # Per tier: make -> monotonic time before which it is not refilled
+        self._retry_at = [{} for _ in self._tiers]
+        self._stopping = False
+        self._cond = threading.Condition()
+        self._threads = [threading.Thread(target=self._run, args=(tier,), name=f"vin-reservoir-{tier}",
+                                          daemon=True)
+                         for tier in range(len(self._tiers))]
+        for thread in self._threads:
+            thread.start()
+
+    def pop(self, make):
+        with self._cond:
+            pool = self.pools.setdefault(make, deque())
+            vin = pool.popleft() if pool else None
+            if vin:
+                self.served += 1
+            else:
+                self.misses += 1
+            if len(pool) < self.low_water:
+                self._cond.notify_all()
+            return vin
+
+    def stats(self):
+        with self._cond:
+            return {
+                "served": self.served,
+                "misses": self.misses,
+                "pools": {make: len(pool) for make, pool in self.pools.items()},
+            }
+
+    def wake(self):
+        # Forget refill backoffs, e.g. after a new source was switched on
+        with self._cond:
+            for retry_at in self._retry_at:
+                retry_at.clear()
+            self._cond.notify_all()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def _next_low_pool(self, tier):
+        now = time.monotonic()
+        retry_at = self._retry_at[tier]
+        # A fallback tier waits until the tier before it came up empty
+        previous = self._retry_at[tier - 1] if tier else None
+        low = [(len(pool), make) for make, pool in self.pools.items()
+               if len(pool) < self.low_water and retry_at.get(make, 0) <= now
+               and (previous is None or previous.get(make, 0) > now)]
+        return min(low)[1] if low else None
+
+    def _run(self, tier):
+        while True:
+            with self._cond:
+                make = self._next_low_pool(tier)
+                while make is None and not self._stopping:
+                    self._cond.wait(timeout=self.idle_wait)
+                    make = self._next_low_pool(tier)
+                if self._stopping:
+                    return
+                wanted = self.capacity - len(self.pools[make])
+            vins = self._fetch(self._tiers[tier], make, wanted)
+            with self._cond:
+                # Sources may repeat VINs (stored draws are with replacement);
+                # a pool never holds more copies than there are distinct VINs
+                pool = self.pools[make]
+                seen = set(pool)
+                fresh = [vin for vin in dict.fromkeys(vins) if vin not in seen]
+                pool.extend(fresh[:self.capacity - len(pool)])
+                # Nothing new for this make right now; retry it later
+                # instead of starving the other pools
+                if not fresh:
+                    self._retry_at[tier][make] = time.monotonic() + self.retry_delay
+                    self._cond.notify_all()
+
+    def _fetch(self, sources, make, count):
+        vins = []
+        for source in sources:
+            try:
+                vins.extend(source(make, count - len(vins)))
+            except Exception as e:
+                print(f"[{datetime.now()}] ⚠️ Refill for {make} failed: {e}")
+            if len(vins) >= count:
+                break
+        return vins
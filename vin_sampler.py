@@ -0,0 +1,100 @@
+# vin_sampler.py
+# O(1) random VIN sampling from make_*.txt files. Every well-formed line is
+# a 17-character VIN plus "\n", so the file is an array of 18-byte records
+# and a random record can be read straight from a memory map.
+import mmap
+import os
+import random
+import threading
+
+RECORD_SIZE = 18
+
+
+class VinSampler:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = None
+        self._size = 0
+        self._aligned = True
+        self._lines = None
+        # Shared across threads (Streamlit sessions, service handlers);
+        # _remap closes the map other readers would be slicing
+        self._lock = threading.Lock()
+        self._remap()
+
+    def _reopen_if_replaced(self):
+        # A file rewritten in place of the old one (vin_validator --repair,
+        # a restore) has a new inode: swap to it under the lock, so no reader
+        # is left holding the old map. A deleted file keeps being served
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return
+        if inode != os.fstat(self._file.fileno()).st_ino:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.close()
+            self._file = open(self.path, "rb")
+            self._remap()
+
+    def _remap(self):
+        size = os.fstat(self._file.fileno()).st_size
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._size = size
+        self._aligned = True
+        self._lines = None
+
+    def _record(self, index):
+        start = index * RECORD_SIZE
+        record = self._map[start:start + RECORD_SIZE]
+        # An aligned record starts right after a newline and ends with one
+        if record[-1:] != b"\n" or (index and self._map[start - 1:start] != b"\n"):
+            return None
+        vin = record[:-1]
+        return vin.decode() if vin.isalnum() else None
+
+    def sample(self, rng=random):
+        with self._lock:
+            return self._sample_locked(rng)
+
+    def _sample_locked(self, rng):
+        self._reopen_if_replaced()
+        if os.fstat(self._file.fileno()).st_size != self._size:
+            self._remap()
+        # Whole records only; a partially written tail is simply ignored
+        records = self._size // RECORD_SIZE
+        if self._aligned and records:
+            vin = self._record(rng.randrange(records))
+            if vin:
+                return vin
+            # A misaligned record means the file has malformed lines
+            self._aligned = False
+        return self._sample_lines(rng)
+
+    def _sample_lines(self, rng):
+        # Slow path for files with malformed or variable-width lines: parsed
+        # once per file size, then every draw is a list lookup
+        if self._lines is None:
+            data = self._map[:self._size] if self._map is not None else b""
+            vins = [line.strip() for line in data.decode(errors="replace").splitlines()]
+            self._lines = [vin for vin in vins if len(vin) == 17 and vin.isalnum()]
+        return rng.choice(self._lines) if self._lines else None
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.close()
+
+
+def sample_vin(path, rng=random):
+    sampler = VinSampler(path)
+    try:
+        return sampler.sample(rng)
+    finally:
+        sampler.close()
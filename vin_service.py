@@ -0,0 +1,220 @@
+# vin_service.py
+# HTTP VIN service for test pipelines:
+#   GET /vin?make=&count=&type=real|fake         -> JSON {"vins": [...]}
+#   GET /vin/stream?make=&count=&type=real|fake  -> NDJSON, one VIN per line
+# Real VINs come from the collector's storage in vin_data/ (falling back to
+# the shared upstream client); fake VINs are generated locally.
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+from aiohttp import web
+
+from upstream import REAL_VIN_API, UPSTREAM_ERRORS, UpstreamClient
+from vin_db import BACKEND, VinDatabase
+from vin_fanout import HitRateTracker, fetch_matching_vin
+from vin_generator import generate_vin
+from vin_sampler import VinSampler
+from wmi_registry import WMI_CODES, WMI_REGISTRY
+
+MAX_COUNT = 10_000
+MAX_STREAM_COUNT = 10_000_000
+MAX_UPSTREAM_COUNT = 10
+UPSTREAM_TIMEOUT = 20.0   # total budget for one request's upstream fetches
+UPSTREAM_PARALLEL = 4     # concurrent fan-outs per request
+CHUNK_SIZE = 1000
+
+
+class VinService:
+    def __init__(self, data_dir="vin_data", backend=BACKEND, rng=random):
+        self.data_dir = data_dir
+        self.rng = rng
+        self.db = VinDatabase(os.path.join(data_dir, "vins.db")) if backend == "sqlite" else None
+        self.samplers = {}
+        self._samplers_lock = threading.Lock()  # sampler() runs in worker threads
+        self.client = None
+        self.tracker = HitRateTracker()
+
+    async def start(self, app):
+        self.client = UpstreamClient(REAL_VIN_API, limit=50)
+
+    async def stop(self, app):
+        await self.client.close()
+        for sampler in self.samplers.values():
+            sampler.close()
+        if self.db is not None:
+            self.db.close()
+
+    def sampler(self, make):
+        path = os.path.join(self.data_dir, f"make_{make}.txt")
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        if not stat.st_size:
+            return None
+        # One sampler per make for the life of the service: it swaps to a
+        # rewritten file (new inode) under its own lock, so a reader in
+        # another thread never sees its map closed
+        with self._samplers_lock:
+            sampler = self.samplers.get(make)
+            if sampler is None:
+                sampler = self.samplers[make] = VinSampler(path)
+            return sampler
+
+    def _stored_counts(self):
+        if self.db is not None:
+            return {make: self.db.count(make) for make in self.db.makes()}
+        counts = {}
+        for make in WMI_CODES:
+            path = os.path.join(self.data_dir, f"make_{make}.txt")
+            if os.path.exists(path) and os.path.getsize(path):
+                counts[make] = max(1, os.path.getsize(path) // 18)
+        return counts
+
+    def _stored_vins(self, make, count):
+        if self.db is not None:
+            return self.db.random_vins(make, count, self.rng)
+        sampler = self.sampler(make)
+        if sampler is None:
+            return []
+        return [vin for vin in (sampler.sample(self.rng) for _ in range(count)) if vin]
+
+    # Storage reads run in a worker thread so a large batch never blocks
+    # the event loop
+    async def stored_counts(self):
+        return await asyncio.to_thread(self._stored_counts)
+
+    async def stored_vins(self, make, count):
+        return await asyncio.to_thread(self._stored_vins, make, count)
+
+    async def upstream_vins(self, make, count):
+        # Up to UPSTREAM_PARALLEL fetches at a time, all cut off at one
+        # deadline; serves whatever arrived before it
+        deadline = time.monotonic() + UPSTREAM_TIMEOUT
+        limit = asyncio.Semaphore(UPSTREAM_PARALLEL)
+
+        async def fetch_one():
+            async with limit:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                if make:
+                    return await fetch_matching_vin(lambda: self.client.fetch(hedge=False),
+                                                    tuple(WMI_REGISTRY[make]), self.tracker, timeout=remaining)
+                return await self.client.fetch()
+
+        tasks = [asyncio.ensure_future(fetch_one()) for _ in range(min(count, MAX_UPSTREAM_COUNT))]
+        done, pending = await asyncio.wait(tasks, timeout=UPSTREAM_TIMEOUT)
+        for task in pending:
+            task.cancel()
+        vins = []
+        for task in done:
+            error = task.exception()
+            if error is not None:
+                if not isinstance(error, UPSTREAM_ERRORS):
+                    raise error
+            elif task.result():
+                vins.append(task.result())
+        return vins
+
+    async def real_vins(self, make, count, allow_upstream=True, counts=None):
+        # counts: stored_counts() already taken for this request, e.g. by a
+        # stream serving many chunks
+        if make:
+            vins = await self.stored_vins(make, count)
+            if not vins and allow_upstream:
+                vins = await self.upstream_vins(make, count)
+            return vins
+        if counts is None:
+            counts = await self.stored_counts()
+        if not counts:
+            return await self.upstream_vins(None, count) if allow_upstream else []
+        # Weight makes by corpus size so the mix matches uniform sampling
+        makes = self.rng.choices(list(counts), weights=list(counts.values()), k=count)
+        vins = []
+        # Sorted, so a seeded rng gives the same VINs on every run
+        for picked, picked_count in sorted(Counter(makes).items()):
+            vins.extend(await self.stored_vins(picked, picked_count))
+        self.rng.shuffle(vins)
+        return vins
+
+    def fake_vins(self, make, count):
+        makes = [make] * count if make else self.rng.choices(list(WMI_CODES), k=count)
+        return [generate_vin(WMI_CODES[m], rng=self.rng) for m in makes]
+
+    async def vins(self, make, count, kind, allow_upstream=True, counts=None):
+        if kind == "fake":
+            return self.fake_vins(make, count)
+        return await self.real_vins(make, count, allow_upstream, counts)
+
+
+SERVICE = web.AppKey("service", VinService)
+
+
+def parse_query(request, max_count):
+    make = request.query.get("make") or None
+    kind = request.query.get("type", "real")
+    try:
+        count = int(request.query.get("count", "1"))
+    except ValueError:
+        raise web.HTTPBadRequest(text="count must be an integer")
+    if make is not None and make not in WMI_CODES:
+        raise web.HTTPBadRequest(text=f"unknown make: {make}")
+    if kind not in ("real", "fake"):
+        raise web.HTTPBadRequest(text="type must be real or fake")
+    if not 1 <= count <= max_count:
+        raise web.HTTPBadRequest(text=f"count must be between 1 and {max_count}")
+    return make, count, kind
+
+
+async def get_vins(request):
+    make, count, kind = parse_query(request, MAX_COUNT)
+    vins = await request.app[SERVICE].vins(make, count, kind)
+    return web.json_response({"make": make, "type": kind, "count": len(vins), "vins": vins})
+
+
+async def stream_vins(request):
+    make, count, kind = parse_query(request, MAX_STREAM_COUNT)
+    service = request.app[SERVICE]
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+    # Streams are served from storage only; the upstream is far too slow
+    # for bulk requests and would be hammered once per chunk. The make
+    # weights are read once for the whole stream, not once per chunk
+    counts = await service.stored_counts() if kind == "real" and not make else None
+    for start in range(0, count, CHUNK_SIZE):
+        vins = await service.vins(make, min(CHUNK_SIZE, count - start), kind, allow_upstream=False,
+                                  counts=counts)
+        if not vins:
+            break
+        await response.write("".join(json.dumps({"vin": vin}) + "\n" for vin in vins).encode())
+    await response.write_eof()
+    return response
+
+
+def create_app(data_dir="vin_data", backend=BACKEND):
+    service = VinService(data_dir, backend)
+    app = web.Application()
+    app[SERVICE] = service
+    app.on_startup.append(service.start)
+    app.on_cleanup.append(service.stop)
+    app.router.add_get("/vin", get_vins)
+    app.router.add_get("/vin/stream", stream_vins)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve VINs over HTTP")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--data-dir", default="vin_data")
+    parser.add_argument("--backend", choices=["files", "sqlite"], default=BACKEND)
+    args = parser.parse_args()
+
+    web.run_app(create_app(args.data_dir, args.backend), host=args.host, port=args.port)
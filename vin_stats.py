@@ -0,0 +1,205 @@
+# vin_stats.py
+# Corpus statistics kept beside the make files in vin_data/vin_stats.json:
+# stored VINs per make with first/last-seen times, and the upstream
+# responses that were duplicates or had an unknown WMI. The collector
+# updates it on every write and saves it with an atomic replace (at most
+# every `save_interval` seconds, and on flush), so totals are one small read
+# instead of a pass over vin_data/.
+#   python vin_stats.py            # show the sidecar
+#   python vin_stats.py verify     # compare it with the corpus, flag malformed files
+#   python vin_stats.py rebuild    # recompute the counts from the corpus
+# Duplicate and unknown-WMI counts describe traffic, not the corpus, so a
+# rebuild keeps them; first/last seen come from SQLite's collected_at, or
+# are kept (falling back to the file's mtime) for the files backend.
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from vin_db import BACKEND, VinDatabase
+from vin_dedupe import corpus_files
+from vin_quota import stored_counts
+from vin_sampler import RECORD_SIZE
+
+STATS_NAME = "vin_stats.json"
+
+
+def _new_make():
+    return {"count": 0, "duplicates": 0, "first_seen": None, "last_seen": None}
+
+
+def _count_lines(path):
+    with open(path, "rb") as f:
+        return sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b""))
+
+
+def scan_corpus(data_dir, db=None):
+    # -> {make: (count, first_seen, last_seen)}; seen times are None where
+    # the backend does not record them. Files count whole 18-byte records,
+    # like vin_quota.stored_counts, which the collector reconciles against
+    if db is not None:
+        return {make: (count, first, last) for make, count, first, last in db.make_stats()}
+    counts = stored_counts(data_dir)
+    return {make: (count, None, os.path.getmtime(os.path.join(data_dir, f"make_{make}.txt")))
+            for make, count in counts.items()}
+
+
+def malformed_files(data_dir):
+    # Make files whose lines are not all 18-byte records (a torn tail or a
+    # malformed line), where the record count is only approximate
+    return [os.path.basename(path) for path in corpus_files(data_dir)
+            if os.path.getsize(path) % RECORD_SIZE or _count_lines(path) != os.path.getsize(path) // RECORD_SIZE]
+
+
+class VinStats:
+    def __init__(self, data_dir="vin_data", save_interval=1.0):
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, STATS_NAME)
+        self.save_interval = save_interval
+        self.makes = {}
+        self.unknown_wmi = 0
+        self.updated_at = None
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        if os.path.exists(self.path):
+            self._load()
+
+    def _load(self):
+        with open(self.path) as f:
+            data = json.load(f)
+        self.makes = {make: dict(_new_make(), **entry) for make, entry in data["makes"].items()}
+        self.unknown_wmi = data["unknown_wmi"]
+        self.updated_at = data["updated_at"]
+
+    def _entry(self, make):
+        entry = self.makes.get(make)
+        if entry is None:
+            entry = self.makes[make] = _new_make()
+        return entry
+
+    def record_saved(self, make, now=None):
+        now = now or time.time()
+        with self._lock:
+            entry = self._entry(make)
+            entry["count"] += 1
+            entry["first_seen"] = entry["first_seen"] or now
+            entry["last_seen"] = now
+            self._changed(now)
+
+    def record_duplicate(self, make):
+        with self._lock:
+            self._entry(make)["duplicates"] += 1
+            self._changed(time.time())
+
+    def record_unknown_wmi(self):
+        with self._lock:
+            self.unknown_wmi += 1
+            self._changed(time.time())
+
+    def _changed(self, now):
+        self.updated_at = now
+        self._dirty = True
+        if time.monotonic() - self._saved_at >= self.save_interval:
+            self._save_locked()
+
+    def total(self):
+        return sum(entry["count"] for entry in self.makes.values())
+
+    def duplicates(self):
+        return sum(entry["duplicates"] for entry in self.makes.values())
+
+    def counts(self):
+        return {make: entry["count"] for make, entry in self.makes.items() if entry["count"]}
+
+    def reconcile(self, stored):
+        # Trust the corpus over a sidecar that missed its last save (e.g.
+        # after a crash); `stored` is {make: count}. Returns the makes fixed
+        with self._lock:
+            fixed = [make for make in set(stored) | set(self.counts())
+                     if stored.get(make, 0) != self._entry(make)["count"]]
+            for make in fixed:
+                self.makes[make]["count"] = stored.get(make, 0)
+            if fixed:
+                self._dirty = True
+                self._save_locked()
+            return sorted(fixed)
+
+    def verify(self, db=None):
+        # -> {make: (sidecar count, scanned count)} for every mismatch
+        scanned = {make: count for make, (count, _, _) in scan_corpus(self.data_dir, db).items()}
+        current = self.counts()
+        return {make: (current.get(make, 0), scanned.get(make, 0))
+                for make in sorted(set(scanned) | set(current))
+                if current.get(make, 0) != scanned.get(make, 0)}
+
+    def rebuild(self, db=None):
+        scanned = scan_corpus(self.data_dir, db)
+        with self._lock:
+            for make in set(self.makes) - set(scanned):
+                self.makes[make]["count"] = 0
+            for make, (count, first, last) in scanned.items():
+                entry = self._entry(make)
+                entry["count"] = count
+                if first is not None:
+                    entry["first_seen"], entry["last_seen"] = first, last
+                else:
+                    entry["first_seen"] = entry["first_seen"] or last
+                    entry["last_seen"] = max(entry["last_seen"] or 0, last)
+            self.updated_at = time.time()
+            self._dirty = True
+            self._save_locked()
+
+    def to_dict(self):
+        return {"updated_at": self.updated_at, "total": self.total(), "duplicates": self.duplicates(),
+                "unknown_wmi": self.unknown_wmi, "makes": self.makes}
+
+    def save(self):
+        with self._lock:
+            self._save_locked()
+
+    def _save_locked(self):
+        if self._dirty:
+            os.makedirs(self.data_dir, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.to_dict(), f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        self._saved_at = time.monotonic()
+
+
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S") if timestamp else "unknown"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show, verify or rebuild vin_data/vin_stats.json")
+    parser.add_argument("command", nargs="?", choices=["show", "verify", "rebuild"], default="show")
+    parser.add_argument("--data-dir", default="vin_data")
+    parser.add_argument("--backend", choices=["files", "sqlite"], default=BACKEND)
+    args = parser.parse_args()
+
+    db = VinDatabase(os.path.join(args.data_dir, "vins.db")) if args.backend == "sqlite" else None
+    stats = VinStats(args.data_dir)
+    if args.command == "verify":
+        for name in malformed_files(args.data_dir) if db is None else []:
+            print(f"⚠️ {name} has malformed lines; run vin_validator.py --repair for exact counts")
+        mismatches = stats.verify(db)
+        for make, (recorded, scanned) in mismatches.items():
+            print(f"❌ {make}: sidecar says {recorded}, corpus has {scanned}")
+        if mismatches:
+            sys.exit("Run `python vin_stats.py rebuild` to fix the sidecar")
+        print(f"✅ vin_stats.json matches the corpus ({stats.total()} VINs)")
+        sys.exit(0)
+    if args.command == "rebuild":
+        stats.rebuild(db)
+        print(f"[{datetime.now()}] ✅ Rebuilt vin_stats.json: {stats.total()} VINs in {len(stats.counts())} makes")
+
+    for make, entry in sorted(stats.makes.items(), key=lambda item: -item[1]["count"]):
+        print(f"{make:<14} {entry['count']:>10,}  dup {entry['duplicates']:>8,}  "
+              f"first {format_time(entry['first_seen'])}  last {format_time(entry['last_seen'])}")
+    print(f"{'Total':<14} {stats.total():>10,}  dup {stats.duplicates():>8,}  unknown WMI {stats.unknown_wmi:,}")
@@ -0,0 +1,97 @@
+# vin_store.py
+# Write-behind VIN store: keeps one append handle per make open, tracks
+# known makes in memory and flushes buffered VINs in groups.
+import os
+import threading
+import time
+from collections import defaultdict
+
+
+class VinStore:
+    def __init__(self, data_dir="vin_data", flush_size=500, flush_interval=1.0):
+        self.data_dir = data_dir
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        os.makedirs(data_dir, exist_ok=True)
+
+        self.name_file = os.path.join(data_dir, "make_name.txt")
+        if os.path.exists(self.name_file):
+            with open(self.name_file) as f:
+                self.known_makes = set(line.strip() for line in f if line.strip())
+        else:
+            self.known_makes = set()
+
+        self._handles = {}
+        self._buffers = defaultdict(list)
+        self._new_makes = []
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def make_path(self, make):
+        return os.path.join(self.data_dir, f"make_{make}.txt")
+
+    def add(self, vin, make):
+        with self._lock:
+            if self._closed:
+                raise ValueError("VinStore is closed")
+            self._buffers[make].append(vin)
+            self._buffered += 1
+            if make not in self.known_makes:
+                self.known_makes.add(make)
+                self._new_makes.append(make)
+            due = (self._buffered >= self.flush_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def sync(self):
+        # Flush and fsync every open file, e.g. before a WAL checkpoint
+        with self._lock:
+            self._flush_locked()
+            for handle in self._handles.values():
+                os.fsync(handle.fileno())
+
+    def _handle(self, path):
+        handle = self._handles.get(path)
+        if handle is None:
+            handle = self._handles[path] = open(path, "a")
+        return handle
+
+    def _flush_locked(self):
+        # Record new makes before their VINs so make_name.txt never lags
+        if self._new_makes:
+            names = self._handle(self.name_file)
+            names.write("".join(make + "\n" for make in self._new_makes))
+            names.flush()
+            self._new_makes.clear()
+
+        for make, vins in self._buffers.items():
+            if vins:
+                handle = self._handle(self.make_path(make))
+                handle.write("".join(vin + "\n" for vin in vins))
+                handle.flush()
+                vins.clear()
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            for handle in self._handles.values():
+                handle.close()
+            self._handles.clear()
+            self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
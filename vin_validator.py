@@ -0,0 +1,118 @@
+# vin_validator.py
+# Bulk VIN structure and check-digit validation with NumPy, plus a
+# scan/repair tool for the collected corpus in vin_data/.
+import argparse
+import glob
+import os
+
+import numpy as np
+
+from vin_generator import TRANSLITERATION, WEIGHTS, compute_check_digit
+
+# Byte value → transliterated value, -1 for characters not allowed in a VIN
+_VALUES = np.full(256, -1, dtype=np.int16)
+for _char, _value in TRANSLITERATION.items():
+    _VALUES[ord(_char)] = _value
+_WEIGHTS = np.array(WEIGHTS, dtype=np.int16)
+_CHECK_CHARS = np.frombuffer(b"0123456789X", dtype=np.uint8)
+
+CHUNK_SIZE = 1_000_000
+
+
+def is_valid_vin(vin):
+    if len(vin) != 17 or any(c not in TRANSLITERATION for c in vin):
+        return False
+    return vin[8] == compute_check_digit(vin)
+
+
+def _as_matrix(vins):
+    arr = np.asarray(vins)
+    if arr.dtype.kind == "U":
+        arr = np.char.encode(arr, "ascii", "replace")
+    elif arr.dtype.kind != "S":
+        arr = arr.astype("S")
+    lengths = np.char.str_len(arr)
+    width = max(arr.dtype.itemsize, 17)
+    matrix = arr.astype(f"S{width}").view(np.uint8).reshape(len(arr), width)
+    return matrix[:, :17], lengths
+
+
+def check_digit_matrix(matrix):
+    # matrix: (n, 17) uint8 VIN bytes -> expected position-9 byte per row,
+    # plus a mask of rows whose characters are all legal
+    values = _VALUES[matrix]
+    totals = (np.clip(values, 0, None) * _WEIGHTS).sum(axis=1) % 11
+    return _CHECK_CHARS[totals], (values >= 0).all(axis=1)
+
+
+def _check_chunk(vins):
+    matrix, lengths = _as_matrix(vins)
+    expected, legal = check_digit_matrix(matrix)
+    return expected, legal & (lengths == 17) & (matrix[:, 8] == expected)
+
+
+def check_digits(vins):
+    vins = np.asarray(vins)
+    out = np.empty(len(vins), dtype="S1")
+    for start in range(0, len(vins), CHUNK_SIZE):
+        expected, _ = _check_chunk(vins[start:start + CHUNK_SIZE])
+        out[start:start + CHUNK_SIZE] = expected.view("S1")
+    return out
+
+
+def validate_many(vins):
+    vins = np.asarray(vins)
+    out = np.empty(len(vins), dtype=bool)
+    for start in range(0, len(vins), CHUNK_SIZE):
+        _, valid = _check_chunk(vins[start:start + CHUNK_SIZE])
+        out[start:start + CHUNK_SIZE] = valid
+    return out
+
+
+def read_vin_file(path):
+    # One record per line: a corrupted line with a space inside stays one
+    # (invalid) record instead of splitting into two
+    with open(path, "rb") as f:
+        lines = [line.strip() for line in f.read().splitlines()]
+    lines = [line for line in lines if line]
+    return np.array(lines, dtype="S") if lines else np.empty(0, dtype="S17")
+
+
+def scan_file(path, repair=False):
+    vins = read_vin_file(path)
+    valid = validate_many(vins)
+    bad = vins[~valid]
+    if repair and len(bad):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            kept = vins[valid]
+            if len(kept):
+                f.write(b"\n".join(kept.tolist()) + b"\n")
+        os.replace(tmp_path, path)
+    return len(vins), bad
+
+
+def scan_corpus(data_dir="vin_data", repair=False):
+    total = invalid = 0
+    for path in sorted(glob.glob(os.path.join(data_dir, "make_*.txt"))):
+        if os.path.basename(path) == "make_name.txt":
+            continue
+        count, bad = scan_file(path, repair)
+        total += count
+        invalid += len(bad)
+        for vin in bad[:5]:
+            print(f"❌ {os.path.basename(path)}: {vin.decode(errors='replace')}")
+        if len(bad) > 5:
+            print(f"   ... and {len(bad) - 5} more in {os.path.basename(path)}")
+    return total, invalid
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate VIN check digits in vin_data/")
+    parser.add_argument("--data-dir", default="vin_data")
+    parser.add_argument("--repair", action="store_true", help="drop invalid VINs from the files")
+    args = parser.parse_args()
+
+    total, invalid = scan_corpus(args.data_dir, args.repair)
+    action = "removed" if args.repair else "found"
+    print(f"✅ Scanned {total} VINs, {invalid} invalid {action}")
@@ -0,0 +1,189 @@
+# vin_wal.py
+# Write-ahead log in front of VinStore. Saved VINs are appended to
+# vin_data/vin_wal.log as CRC-checked records and fsynced in groups every
+# `commit_interval` seconds, then applied to the per-make files. A
+# checkpoint fsyncs the make files and restarts the log with their sizes.
+#
+# After a crash the log is replayed on startup: the make files are cut back
+# to the checkpointed sizes (dropping half-written lines and VINs whose make
+# never reached make_name.txt) and every intact record is applied again. A
+# torn or corrupt tail record is detected by its checksum and discarded.
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+
+from vin_metrics import histogram
+from vin_store import VinStore
+
+WAL_NAME = "vin_wal.log"
+_HEADER = struct.Struct("<IIB")  # crc32 of type + payload, payload length, type
+_VIN = 1
+_CHECKPOINT = 2
+
+WAL_COMMIT_SECONDS = histogram("vin_wal_commit_seconds", "WAL group commit duration (write + fsync + apply)")
+
+
+def encode_record(kind, payload):
+    return _HEADER.pack(zlib.crc32(bytes([kind]) + payload), len(payload), kind) + payload
+
+
+def read_records(path):
+    # -> (records, end of the last intact record, file size)
+    with open(path, "rb") as f:
+        data = f.read()
+    records, offset = [], 0
+    while offset + _HEADER.size <= len(data):
+        crc, length, kind = _HEADER.unpack_from(data, offset)
+        start = offset + _HEADER.size
+        payload = data[start:start + length]
+        if len(payload) != length or zlib.crc32(bytes([kind]) + payload) != crc:
+            break
+        records.append((kind, payload))
+        offset = start + length
+    return records, offset, len(data)
+
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class WalStore:
+    def __init__(self, data_dir="vin_data", commit_interval=0.02, checkpoint_bytes=4 << 20,
+                 checkpoint_interval=60.0):
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, WAL_NAME)
+        self.commit_interval = commit_interval
+        self.checkpoint_bytes = checkpoint_bytes
+        self.checkpoint_interval = checkpoint_interval
+        self.commits = 0
+        os.makedirs(data_dir, exist_ok=True)
+
+        # Recover before VinStore reads make_name.txt
+        replay, self.torn_bytes = self._recover()
+        self.store = VinStore(data_dir)
+        for vin, make in replay:
+            self.store.add(vin, make)
+        self.replayed = len(replay)
+        if replay or self.torn_bytes:
+            print(f"[{datetime.now()}] 🩹 WAL replay: {self.replayed} VINs restored, "
+                  f"{self.torn_bytes} torn bytes discarded")
+
+        self._wal = None
+        self._commit_lock = threading.Lock()
+        self._checkpoint_locked()
+
+        self._pending = []
+        self._stopping = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="vin-wal", daemon=True)
+        self._thread.start()
+
+    def _file_sizes(self):
+        names = [name for name in os.listdir(self.data_dir)
+                 if name.startswith("make_") and name.endswith(".txt")]
+        return {name: os.path.getsize(os.path.join(self.data_dir, name)) for name in names}
+
+    def _recover(self):
+        if not os.path.exists(self.path):
+            return [], 0
+        records, end, size = read_records(self.path)
+        if records and records[0][0] == _CHECKPOINT:
+            sizes = json.loads(records[0][1])["files"]
+            # Anything past the checkpoint is either in the log or was lost
+            # with it; files created after the checkpoint start empty
+            for name, current in self._file_sizes().items():
+                if current > sizes.get(name, 0):
+                    os.truncate(os.path.join(self.data_dir, name), sizes.get(name, 0))
+        vins = [tuple(payload.decode().split("\t", 1)) for kind, payload in records if kind == _VIN]
+        return vins, size - end
+
+    def add(self, vin, make):
+        with self._cond:
+            if self._stopping:
+                raise ValueError("WalStore is closed")
+            self._pending.append((vin, make))
+            if len(self._pending) == 1:
+                self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._pending and not self._stopping:
+                    self._cond.wait()
+                stopping = self._stopping
+            if not stopping:
+                # Let the rest of the group arrive before paying for the fsync
+                time.sleep(self.commit_interval)
+            self.commit()
+            if stopping:
+                return
+
+    def commit(self):
+        # Durable in the log first, then visible in the make files
+        with self._commit_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            with WAL_COMMIT_SECONDS.time():
+                self._wal.write(b"".join(encode_record(_VIN, f"{vin}\t{make}".encode())
+                                         for vin, make in batch))
+                self._wal.flush()
+                os.fsync(self._wal.fileno())
+                for vin, make in batch:
+                    self.store.add(vin, make)
+                self.store.flush()
+            self.commits += 1
+            if (self._wal.tell() >= self.checkpoint_bytes
+                    or time.monotonic() - self._checkpointed_at >= self.checkpoint_interval):
+                self._checkpoint_locked()
+
+    def checkpoint(self):
+        with self._commit_lock:
+            self._checkpoint_locked()
+
+    def _checkpoint_locked(self):
+        # Make files are fsynced before the log that covers them is dropped
+        self.store.sync()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(encode_record(_CHECKPOINT, json.dumps({"files": self._file_sizes()}).encode()))
+            f.flush()
+            os.fsync(f.fileno())
+        if self._wal is not None:
+            self._wal.close()
+        os.replace(tmp_path, self.path)
+        _fsync_dir(self.data_dir)
+        self._wal = open(self.path, "ab")
+        self._checkpointed_at = time.monotonic()
+
+    def flush(self):
+        self.commit()
+
+    def close(self):
+        with self._cond:
+            if self._stopping:
+                return
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join()
+        with self._commit_lock:
+            self.store.sync()
+            self.store.close()
+            self._wal.close()
+            # A clean shutdown leaves nothing to replay
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
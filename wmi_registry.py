@@ -0,0 +1,82 @@
+# wmi_registry.py
+# WMI → make registry with a precomputed prefix index for O(1) lookups.
+import numpy as np
+
+# Every known WMI per make; the first entry is the make's primary code
+# used for generation and manufacturer-specific fetches.
+WMI_REGISTRY = {
+    "Toyota": ["JTD", "JTE", "JTK", "JTL", "JTM", "JTN", "JT2", "JT3", "JT4", "2T1", "2T3",
+               "4T1", "4T3", "4T4", "5TB", "5TD", "5TE", "5TF", "5TN"],
+    "Ford": ["1FT", "1FA", "1FB", "1FC", "1FD", "1FM", "2FA", "2FM", "2FT", "3FA", "3FE",
+             "3FM", "3FT", "NM0", "WF0", "MAJ"],
+    "Honda": ["1HG", "2HG", "2HJ", "2HK", "5FN", "5J6", "JHL", "JHM", "SHH", "SHS", "19X"],
+    "BMW": ["WBA", "WBS", "WBX", "WBY", "4US", "5UM", "5UX", "5YM"],
+    "Mercedes": ["WDB", "WDC", "WDD", "WDF", "W1K", "W1N", "W1V", "4JG", "55S"],
+    "Chevrolet": ["1GC", "1G1", "1GB", "1GN", "2G1", "2GC", "2GN", "3G1", "3GC", "3GN", "KL1", "KL8"],
+    "Tesla": ["5YJ", "7SA", "7G2", "LRW", "XP7", "SFZ"],
+    "Audi": ["WAU", "WA1", "WUA", "TRU"],
+    "Nissan": ["1N4", "1N6", "3N1", "3N6", "5N1", "JN1", "JN6", "JN8", "SJN"],
+    "Hyundai": ["KMH", "KM8", "5NM", "5NP", "TMA", "MAL"],
+    "Kia": ["KNA", "KND", "5XX", "5XY", "3KP", "U5Y"],
+    "Jeep": ["1J4", "1J8", "ZAC"],
+    "Dodge": ["1B3", "1B4", "1B7", "2B3", "2B4", "2B7", "3B7", "1D3", "1D7", "2D3", "3D7"],
+    "Volkswagen": ["3VW", "1VW", "3VV", "WVW", "WVG", "WV1", "WV2", "9BW"],
+    "Subaru": ["JF1", "JF2", "4S3", "4S4", "4S6"],
+    "Mazda": ["JM1", "JM3", "JMZ", "1YV", "4F2", "3MZ", "3MV"],
+    "Lexus": ["JTH", "JTJ", "JT6", "JT8", "2T2", "58A"],
+    "Volvo": ["YV1", "YV4", "7JR", "LYV"],
+    "Porsche": ["WP0", "WP1"],
+    "Jaguar": ["SAJ", "SAD"],
+    "Land Rover": ["SAL"],
+    "Mitsubishi": ["JA3", "JA4", "4A3", "4A4", "ML3", "JMB"],
+    "Infiniti": ["JNK", "JNR", "JNX", "5N3", "3PC"],
+    "Acura": ["19U", "19V", "JH4", "2HN", "5J8"],
+    "Ferrari": ["ZFF"],
+    "Lamborghini": ["ZHW"],
+    "Bugatti": ["VF9"],
+    "Rolls-Royce": ["SCA"],
+    "Bentley": ["SCB", "SJA"],
+}
+
+# Two-character manufacturer prefixes, consulted only when no
+# three-character WMI matches (so JTH still resolves to Lexus).
+PREFIX_REGISTRY = {
+    "Toyota": ["JT"],
+    "BMW": ["WB"],
+    "Subaru": ["JF"],
+    "Porsche": ["WP"],
+    "Volvo": ["YV"],
+}
+
+WMI_CODES = {make: wmis[0] for make, wmis in WMI_REGISTRY.items()}
+
+
+def _build_index(registry, length):
+    index = {}
+    for make, codes in registry.items():
+        for code in codes:
+            if len(code) != length:
+                raise ValueError(f"{make}: expected a {length}-character prefix, got {code!r}")
+            if index.setdefault(code, make) != make:
+                raise ValueError(f"{code} is registered to both {index[code]} and {make}")
+    return index
+
+
+_WMI_INDEX = _build_index(WMI_REGISTRY, 3)
+_PREFIX_INDEX = _build_index(PREFIX_REGISTRY, 2)
+
+
+def classify(vin):
+    return _WMI_INDEX.get(vin[:3]) or _PREFIX_INDEX.get(vin[:2])
+
+
+def classify_many(vins):
+    # Resolve each distinct WMI once, then broadcast back to every VIN
+    arr = np.asarray(vins)
+    if arr.dtype.kind == "U":
+        arr = np.char.encode(arr, "ascii", "replace")
+    if len(arr) == 0:
+        return np.empty(0, dtype=object)
+    wmis, inverse = np.unique(arr.astype("S3"), return_inverse=True)
+    makes = np.array([classify(w.decode()) for w in wmis], dtype=object)
+    return makes[inverse.reshape(-1)]
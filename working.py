@@ -1,6 +1,7 @@
 import streamlit as st
 import aiohttp
 import asyncio
+from upstream import REAL_VIN_API
 
 # Apply Dark Theme with Monospace Font
 st.set_page_config(page_title="VIN Generator", layout="centered")
@@ -16,7 +17,7 @@ WMI_CODES = {
 }
 
 # Function to fetch a real VIN asynchronously
-API_URL = "https://randomvin.com/getvin.php?type=real"
+API_URL = REAL_VIN_API
 
 async def fetch_vin(session):
     async with session.get(API_URL) as response: